@@ -0,0 +1,267 @@
+# Benchmarks for bitgraphics: JSON codec, compositing, text, image conversion and the display path.
+# Runs on desktop Python. Also written for MicroPython's Unix port (cases needing Pillow or the desktop tools are skipped there), but not yet run on it.
+#
+# usage: python bench/bench.py [options]
+#   --out PATH           write the results as JSON to PATH (default: print them)
+#   --baseline PATH      compare against the results in PATH (default: bench/baseline.json, if it exists)
+#   --save-baseline      write the results to the baseline file instead of comparing against it
+#   --filter TEXT        only run the cases whose name contains TEXT
+#   --tolerance RATIO    how much slower than the baseline a case can be before it counts as a regression (default: 0.5, i.e. 50%; timings on a busy machine easily vary by 25%)
+#   --min-ms MS          how long to keep repeating each case for (default: 200)
+# Exits with status 1 if any case regressed.
+
+import sys
+import json
+
+# make the modules in src/ importable, wherever this is run from
+_here = __file__.replace("\\", "/")
+_here = _here[0:_here.rfind("/")] if "/" in _here else "."
+sys.path.insert(0, _here + "/../src")
+
+import bitgraphics
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError: # not on MicroPython
+    from time import perf_counter
+
+    def ticks_us():
+        return int(perf_counter() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+try:
+    import gc
+except ImportError:
+    gc = None
+
+MICROPYTHON = sys.implementation.name == "micropython"
+GRAPHICS = _here + "/../graphics"
+
+
+# helpers
+
+class _Random:
+    """Small deterministic pseudo-random generator (the same numbers on every Python, unlike the random module)"""
+
+    def __init__(self, seed):
+        self.state = seed
+
+    def next(self, limit):
+        self.state = (self.state * 1103515245 + 12345) & 0x7FFFFFFF
+        return self.state % limit
+
+
+def random_graphic(width, height, seed=1, density=2):
+    """A BitGraphic with about 1 in density pixels on"""
+    rng = _Random(seed)
+    bg = bitgraphics.BitGraphic()
+    bg.from_blank(width, height)
+    for y in range(height):
+        for x in range(width):
+            if rng.next(density) == 0:
+                bg.set_bit(x, y, True)
+    return bg
+
+
+def measure(fn, min_ms):
+    """Calls fn repeatedly for at least min_ms and returns (microseconds per call in the fastest batch, number of calls). Fast functions are timed in batches of calls lasting at least a millisecond, so the clock's resolution doesn't matter."""
+    fn() # warm up first, so a slow first call (i.e. filling a cache) doesn't set the batch size
+    if gc != None:
+        gc.collect()
+
+    # find a batch size that takes at least a millisecond
+    batch = 1
+    while True:
+        start = ticks_us()
+        for i in range(batch):
+            fn()
+        elapsed = ticks_diff(ticks_us(), start)
+        if elapsed >= 1000 or batch >= 65536:
+            break
+        batch = batch * 2
+
+    best = elapsed / batch
+    calls = batch
+    started = ticks_us()
+    while ticks_diff(ticks_us(), started) < min_ms * 1000:
+        start = ticks_us()
+        for i in range(batch):
+            fn()
+        elapsed = ticks_diff(ticks_us(), start) / batch
+        if elapsed < best:
+            best = elapsed
+        calls = calls + batch
+    return (round(best, 2), calls)
+
+
+# cases: each yields (name, function to time)
+
+def codec_cases():
+    for size in (16, 64, 128, 256, 512):
+        bg = random_graphic(size, size, size)
+        name = str(size) + "x" + str(size)
+        for encoding in (bitgraphics.ENCODING_BIN, bitgraphics.ENCODING_HEX):
+            text = bg.to_json(encoding)
+            yield ("codec.to_json." + encoding + "." + name, lambda bg=bg, encoding=encoding: bg.to_json(encoding))
+            yield ("codec.from_json." + encoding + "." + name, lambda text=text: bitgraphics.BitGraphic(jsond=text))
+        data = bg.to_bytes()
+        yield ("codec.from_bytes." + name, lambda data=data: bitgraphics.BitGraphic().from_bytes(data))
+
+
+def group_cases():
+    glyph = random_graphic(16, 16, 7)
+    for members in (1, 10, 100):
+        group = bitgraphics.BitGraphicGroup()
+        for i in range(members):
+            group.add(glyph, (i % 10) * 12, (i // 10) * 12)
+        yield ("group.flatten." + str(members), group.flatten)
+        blended = bitgraphics.BitGraphicGroup()
+        for i in range(members):
+            blended.add(glyph, (i % 10) * 12, (i // 10) * 12, bitgraphics.BLEND_XOR)
+        yield ("group.flatten_xor." + str(members), blended.flatten)
+
+
+def text_cases():
+    yield ("text.typewriter_init", bitgraphics.Typewriter)
+    uncached = bitgraphics.Typewriter(cache_bytes=0)
+    cached = bitgraphics.Typewriter()
+    for length in (1, 8, 32):
+        text = ("hello world 0123456789 abcdefghijklmnopqrstuvwxyz")[0:length]
+        def write_fresh(text=text):
+            uncached._last.clear() # no reuse of the previous text either
+            uncached.write(text, 16, 16)
+        yield ("text.write." + str(length), write_fresh)
+        yield ("text.write_cached." + str(length), lambda text=text: cached.write(text, 16, 16))
+
+
+def conversion_cases():
+    if MICROPYTHON or not hasattr(bitgraphics, "image_to_BitGraphic") or bitgraphics.PIL == None:
+        return
+    import io
+    import os
+    import shutil
+    import tempfile
+    from contextlib import redirect_stdout
+    for folder in sorted(os.listdir(GRAPHICS)):
+        for sub in sorted(os.listdir(GRAPHICS + "/" + folder)) if os.path.isdir(GRAPHICS + "/" + folder) else []:
+            if not sub.startswith("bitmaps"):
+                continue
+            bitmaps = GRAPHICS + "/" + folder + "/" + sub
+            first = bitmaps + "/" + sorted(os.listdir(bitmaps))[0]
+            yield ("convert.image." + folder, lambda first=first: bitgraphics.image_to_BitGraphic(first, resize=(16, 16)))
+            def convert_all(bitmaps=bitmaps):
+                out = tempfile.mkdtemp()
+                try:
+                    with redirect_stdout(io.StringIO()): # it prints a line per image, which shouldn't be timed
+                        bitgraphics.images_to_BitGraphics(bitmaps, out, resize=(16, 16))
+                finally:
+                    shutil.rmtree(out)
+            yield ("convert.images." + folder, convert_all)
+
+
+def display_cases():
+    display = bitgraphics.BitGraphicDisplay.headless(128, 64)
+    small = random_graphic(16, 16, 3)
+    large = random_graphic(64, 64, 4)
+    sparse = bitgraphics.SparseBitGraphic(random_graphic(64, 64, 5, 40))
+    yield ("display.display.16x16", lambda: display.display(small, 10, 10))
+    yield ("display.display.64x64", lambda: display.display(large, 10, 0))
+    yield ("display.display_sparse.64x64", lambda: display.display(sparse, 10, 0))
+    yield ("display.display_transparent.64x64", lambda: display.display(large, 10, 0, transparent=True))
+    yield ("display.show.full", lambda: display.show(True))
+    def show_changed(): # the same work on every call (alternating between calls would let the fastest batch time only the cheaper half)
+        display.display(small, 0, 0)
+        display.show()
+        display.display(large, 0, 0)
+        display.show()
+    yield ("display.show.changed", show_changed)
+
+
+CASES = (codec_cases, group_cases, text_cases, conversion_cases, display_cases)
+
+
+# running and comparing
+
+def run(name_filter=None, min_ms=200):
+    results = {}
+    for cases in CASES:
+        for name, fn in cases():
+            if name_filter != None and name_filter not in name:
+                continue
+            best, calls = measure(fn, min_ms)
+            results[name] = {"us": best, "calls": calls}
+            print(name + ": " + str(best) + " us (" + str(calls) + " calls)")
+    return {"implementation": sys.implementation.name, "platform": sys.platform, "results": results}
+
+
+def compare(results, baseline, tolerance):
+    """Prints how each case changed against the baseline and returns the names of the ones that got slower by more than tolerance"""
+    regressions = []
+    before = baseline["results"]
+    if baseline.get("implementation") != results["implementation"]:
+        print("note: the baseline was measured on " + str(baseline.get("implementation")) + ", not " + results["implementation"])
+    for name in results["results"]:
+        if name not in before:
+            print(name + ": new")
+            continue
+        old = before[name]["us"]
+        new = results["results"][name]["us"]
+        ratio = new / old if old > 0 else 1.0
+        status = ""
+        if ratio > 1 + tolerance:
+            status = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / (1 + tolerance):
+            status = "  faster"
+        print(name + ": " + str(old) + " -> " + str(new) + " us (x" + str(round(ratio, 2)) + ")" + status)
+    return regressions
+
+
+def main(argv):
+    options = {"--out": None, "--baseline": _here + "/baseline.json", "--filter": None, "--tolerance": "0.5", "--min-ms": "200"}
+    save = False
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--save-baseline":
+            save = True
+        elif argv[i] in options and i + 1 < len(argv):
+            options[argv[i]] = argv[i + 1]
+            i = i + 1
+        else:
+            print("unknown option '" + argv[i] + "' (see the top of bench.py)")
+            return 2
+        i = i + 1
+
+    results = run(options["--filter"], int(options["--min-ms"]))
+
+    if save:
+        f = open(options["--baseline"], "w")
+        f.write(json.dumps(results))
+        f.close()
+        print("saved baseline to " + options["--baseline"])
+        return 0
+
+    if options["--out"] != None:
+        f = open(options["--out"], "w")
+        f.write(json.dumps(results))
+        f.close()
+    else:
+        print(json.dumps(results))
+
+    try:
+        f = open(options["--baseline"], "r")
+    except OSError:
+        return 0
+    baseline = json.loads(f.read())
+    f.close()
+    regressions = compare(results, baseline, float(options["--tolerance"]))
+    if len(regressions) > 0:
+        print(str(len(regressions)) + " regression(s): " + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
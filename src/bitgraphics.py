@@ -12,51 +12,712 @@ THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR I
 
 import json
 import sys
+import binascii
+import ssd1306
+
+try:
+    import framebuf
+except ImportError: # not on a microcontroller, use the pure-Python stand-in
+    import pyframebuf as framebuf
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError: # not on MicroPython
+    import time as _time
+    def ticks_us() -> int:
+        return int(_time.perf_counter() * 1000000)
+    def ticks_diff(end:int, start:int) -> int:
+        return end - start
+
+def _asyncio():
+    """Imports asyncio (uasyncio on older MicroPython) only when it is actually used"""
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
+# compact binary BitGraphic format
+BINARY_EXTENSION:str = ".bg"
+BINARY_VERSION:int = 0
+BINARY_HEADER_SIZE:int = 7 # "BG", version, width (2 bytes), height (2 bytes)
+BINARY_FLAG_RLE:int = 0x80 # set in the version byte when the pixels are run-length encoded (see SparseBitGraphic) instead of packed rows
+
+def _parse_header(data:bytes) -> tuple[int, int]:
+    """Validates a binary BitGraphic header and returns the (width, height) it describes"""
+    if len(data) < BINARY_HEADER_SIZE or data[0] != 0x42 or data[1] != 0x47:
+        raise Exception("Data is not a binary BitGraphic (missing 'BG' header).")
+    if data[2] & ~BINARY_FLAG_RLE != BINARY_VERSION:
+        raise Exception("Binary BitGraphic format version " + str(data[2] & ~BINARY_FLAG_RLE) + " is not supported.")
+    return (data[3] | (data[4] << 8), data[5] | (data[6] << 8))
+
+def _rle_encode(rows:list, width:int, height:int) -> bytearray:
+    """Encodes the spans of each row (see SparseBitGraphic.rows) after a binary header: for each row, the number of spans, then the gap before each span and its length, all as varints (7 bits per byte, least significant first, high bit set on all but the last byte)"""
+    ToReturn:bytearray = bytearray([0x42, 0x47, BINARY_VERSION | BINARY_FLAG_RLE, width & 0xFF, width >> 8, height & 0xFF, height >> 8])
+    for y in range(0, height):
+        spans = rows[y]
+        values:list[int] = [len(spans) >> 1]
+        end:int = 0 # where the previous span ended
+        for i in range(0, len(spans), 2):
+            values.append(spans[i] - end)
+            values.append(spans[i + 1])
+            end = spans[i] + spans[i + 1]
+        for value in values:
+            while value > 0x7F:
+                ToReturn.append((value & 0x7F) | 0x80)
+                value = value >> 7
+            ToReturn.append(value)
+    return ToReturn
+
+def _rle_decode(data:bytes, height:int) -> list:
+    """Decodes the spans of each row from run-length encoded binary BitGraphic data (see _rle_encode)"""
+    rows:list = []
+    i:int = BINARY_HEADER_SIZE
+    try:
+        for y in range(0, height):
+            values:list[int] = []
+            count:int = -1
+            while count != 0:
+                value:int = 0
+                shift:int = 0
+                while True:
+                    b:int = data[i]
+                    i = i + 1
+                    value = value | ((b & 0x7F) << shift)
+                    shift = shift + 7
+                    if b < 0x80:
+                        break
+                if count == -1:
+                    count = value * 2
+                else:
+                    values.append(value)
+                    count = count - 1
+            if len(values) == 0:
+                rows.append(_NO_SPANS)
+                continue
+            end:int = 0
+            for s in range(0, len(values), 2): # gaps to positions
+                values[s] = values[s] + end
+                end = values[s] + values[s + 1]
+            rows.append(values)
+    except IndexError:
+        raise Exception("Run-length encoded BitGraphic data is truncated.")
+    return rows
+
+_NO_SPANS:tuple = () # shared by every empty row of every SparseBitGraphic
+
+# blend modes for BitGraphic.blit and BitGraphicGroup
+BLEND_OR:int = 0 # pixels on in either graphic are on (the default)
+BLEND_AND:int = 1 # only pixels on in both graphics stay on, within the area covered
+BLEND_XOR:int = 2 # pixels on in the drawn graphic toggle the pixels below them
+BLEND_OVERWRITE:int = 3 # the drawn graphic replaces everything below it, including turning pixels off
+BLEND_MASK:int = 4 # pixels on in the drawn graphic turn the pixels below them off
+
+# JSON BitGraphic encodings of the "bits" property
+ENCODING_BIN:str = "bin" # one "0" or "1" character per pixel, row by row with no padding (the original format, implied when "encoding" is absent)
+ENCODING_HEX:str = "hex" # the packed rows (same layout as the binary format) as hexadecimal
+ENCODING_BASE64:str = "base64" # the packed rows (same layout as the binary format) as base64
+
+_BITS_CHUNK:int = 256 # "0"/"1" characters converted per int() call. Must be a multiple of 8; keeps the conversion linear on ports where big ints parse in quadratic time
+_BYTE_BITS:list[str] = [] # the 8-character "0"/"1" string for every byte value
+for _b in range(256):
+    _BYTE_BITS.append("".join(["1" if _b & (0x80 >> _i) else "0" for _i in range(8)]))
+del _b
+_REVERSED_BYTES:bytearray = bytearray(256) # every byte value with its bits in reverse order, for mirroring rows
+for _b in range(256):
+    for _i in range(8):
+        if _b & (1 << _i):
+            _REVERSED_BYTES[_b] = _REVERSED_BYTES[_b] | (0x80 >> _i)
+del _b, _i
+_STRETCHED_BYTES:dict[int, list[int]] = {} # factor -> the (8 * factor)-bit int of every byte value with each bit repeated factor times, built on first use by BitGraphic.scale
+
+def _transpose8(block:int) -> int:
+    """Transposes an 8x8 block of pixels held as a 64-bit int (8 rows of 8 pixels, top row in the most significant byte, left-most pixel in each byte's most significant bit)"""
+    t:int = (block ^ (block >> 7)) & 0x00AA00AA00AA00AA
+    block = block ^ t ^ (t << 7)
+    t = (block ^ (block >> 14)) & 0x0000CCCC0000CCCC
+    block = block ^ t ^ (t << 14)
+    t = (block ^ (block >> 28)) & 0x00000000F0F0F0F0
+    return block ^ t ^ (t << 28)
+
+def _writable(buf) -> bool:
+    """Whether a buffer can be written to (framebuf.FrameBuffer only accepts buffers that can)"""
+    if isinstance(buf, bytearray):
+        return True
+    if isinstance(buf, bytes) or len(buf) == 0: # an empty buffer is copied for nothing, so don't bother finding out
+        return False
+    try:
+        buf[0] = buf[0]
+    except TypeError: # i.e. a memoryview of bytes
+        return False
+    return True
+
+def _pack_bitstring(chunks, keep_text:bool = False) -> tuple[bytearray, int]:
+    """
+    Packs an iterable of "0"/"1" string pieces into a flat bytearray (no row padding). Returns the bytearray and the number of bits it holds.
+    With keep_text, a piece that is not all 0's and 1's makes it return the whole string instead (the pieces before it rebuilt from the packed bits), for a caller that does not know the encoding yet.
+    """
+    packed:bytearray = bytearray()
+    pending:str = ""
+    nbits:int = 0
+    for chunk in chunks:
+        if chunk.count("0") + chunk.count("1") != len(chunk):
+            if keep_text:
+                return "".join([_BYTE_BITS[b] for b in packed]) + pending + chunk + "".join(chunks)
+            for c in chunk:
+                if c != "0" and c != "1":
+                    raise Exception("Character '" + c + "' in JSON-serialized 'bits' property is not a valid 0 or 1.")
+        nbits = nbits + len(chunk)
+        if len(pending) > 0:
+            chunk = pending + chunk
+        usable:int = len(chunk) - (len(chunk) % 8)
+        for i in range(0, usable, _BITS_CHUNK):
+            piece:str = chunk[i:min(i + _BITS_CHUNK, usable)]
+            packed.extend(int(piece, 2).to_bytes(len(piece) // 8, "big"))
+        pending = chunk[usable:]
+    if len(pending) > 0:
+        packed.extend(int(pending + "0" * (8 - len(pending)), 2).to_bytes(1, "big"))
+    return (packed, nbits)
+
+def _decode_packed(chunks, encoding:str) -> bytearray:
+    """Decodes an iterable of hex or base64 string pieces into bytes"""
+    decoded:bytearray = bytearray()
+    pending:str = ""
+    group:int = 2 if encoding == ENCODING_HEX else 4 # characters per whole unit
+    for chunk in chunks:
+        if len(pending) > 0:
+            chunk = pending + chunk
+        usable:int = len(chunk) - (len(chunk) % group)
+        if usable > 0:
+            if encoding == ENCODING_HEX:
+                decoded.extend(binascii.unhexlify(chunk[0:usable]))
+            else:
+                decoded.extend(binascii.a2b_base64(chunk[0:usable]))
+        pending = chunk[usable:]
+    if len(pending) > 0:
+        raise Exception("JSON-serialized 'bits' property is not valid " + encoding + ".")
+    return decoded
+
+class _JsonStream:
+    """Minimal pull parser over a file object for the flat BitGraphic JSON object, so the "bits" string can be consumed in pieces rather than loaded whole"""
+
+    def __init__(self, f, chunk_size:int = 1024) -> None:
+        self.f = f
+        self.chunk_size:int = chunk_size
+        self.text:str = ""
+        self.pos:int = 0
+        self.partial:bytes = b"" # the start of a multi-byte character cut off at the end of the last read
+
+    def _fill(self) -> bool:
+        data = ""
+        while len(data) == 0:
+            data = self.f.read(self.chunk_size)
+            if not data:
+                return False
+            if type(data) != str:
+                data = self.partial + data
+
+                # hold back a character whose bytes run on into the next read, as it can't be decoded on its own
+                end:int = len(data)
+                i:int = end - 1
+                while i > 0 and i > end - 4 and (data[i] & 0xC0) == 0x80: # continuation bytes
+                    i = i - 1
+                if data[i] >= 0xC0 and end - i < (2 if data[i] < 0xE0 else 3 if data[i] < 0xF0 else 4):
+                    end = i
+                self.partial = data[end:]
+                data = data[0:end].decode("utf-8")
+        self.text = self.text[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def next_char(self) -> str:
+        """Returns the next non-whitespace character"""
+        while True:
+            while self.pos < len(self.text):
+                c:str = self.text[self.pos]
+                self.pos = self.pos + 1
+                if c != " " and c != "\n" and c != "\r" and c != "\t":
+                    return c
+            if not self._fill():
+                raise Exception("Unexpected end of JSON-serialized BitGraphic.")
+
+    def string_chunks(self):
+        """Yields the contents of the string whose opening quote was just read, piece by piece"""
+        while True:
+            end:int = self.text.find('"', self.pos)
+            piece:str = self.text[self.pos:] if end < 0 else self.text[self.pos:end]
+            if "\\" in piece:
+                raise Exception("Escaped characters are not supported in a JSON-serialized BitGraphic.")
+            if end >= 0:
+                self.pos = end + 1
+                yield piece
+                return
+            self.pos = len(self.text)
+            yield piece
+            if not self._fill():
+                raise Exception("Unexpected end of JSON-serialized BitGraphic.")
+
+    def skip_value(self, first:str) -> None:
+        """Skips the rest of the value (of any type) whose first character was just read"""
+        depth:int = 0
+        c:str = first
+        while True:
+            if c == '"':
+                self._skip_string()
+            elif c == "{" or c == "[":
+                depth = depth + 1
+            elif c == "}" or c == "]":
+                depth = depth - 1
+            elif c != "," and c != ":": # a number, true, false or null, running until the next delimiter
+                while self.pos < len(self.text) or self._fill():
+                    if self.text[self.pos] in ",:]} \n\r\t":
+                        break
+                    self.pos = self.pos + 1
+            if depth == 0:
+                return
+            c = self.next_char()
+
+    def _skip_string(self) -> None:
+        """Skips the rest of the string whose opening quote was just read, escaped characters included"""
+        escaped:bool = False
+        while True:
+            if self.pos >= len(self.text) and not self._fill():
+                raise Exception("Unexpected end of JSON-serialized BitGraphic.")
+            c:str = self.text[self.pos]
+            self.pos = self.pos + 1
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                return
+
+    def read_number(self, first:str) -> int:
+        """Reads the rest of the integer whose first character was just read"""
+        digits:str = first
+        while True:
+            if self.pos >= len(self.text) and not self._fill():
+                break
+            c:str = self.text[self.pos]
+            if c < "0" or c > "9":
+                break
+            digits = digits + c
+            self.pos = self.pos + 1
+        return int(digits)
 
 class BitGraphic:
     def __init__(self, jsond:str = None, path:str = None) -> None:
-        self.bits:list[bool] = []
+        self.buf:bytearray = bytearray() # packed pixels, 1 bit per pixel, most significant bit first, each row starting on a fresh byte
+        self.stride:int = 0 # number of bytes per row in buf
         self.width:int = 0
         self.height:int = 0
+        self._fb:framebuf.FrameBuffer = None # cached by to_framebuffer
+        self._fb_key:tuple = None # the (buf, width, height) _fb was made for
 
         # if they provided JSON, deserialize using that
         if jsond != None:
             self.from_json(jsond)
 
-        # if they provided a path, deserialize using the JSON within that
+        # if they provided a path, deserialize using the file's contents (binary or JSON)
         if path != None:
-            f = open(path, "r")
-            txt = f.read()
-            f.close()
-            self.from_json(txt)
+            self.from_file(path)
 
     def bit(self, x:int, y:int) -> bool:
         """Returns the bit value for a given coordinate"""
-        bit_index:int = (y * self.width) + x
-        return self.bits[bit_index]
+        return (self.buf[(y * self.stride) + (x >> 3)] & (0x80 >> (x & 7))) != 0
+
+    def set_bit(self, x:int, y:int, value:bool) -> None:
+        """Sets the bit value for a given coordinate"""
+        byte_index:int = (y * self.stride) + (x >> 3)
+        if value:
+            self.buf[byte_index] = self.buf[byte_index] | (0x80 >> (x & 7))
+        else:
+            self.buf[byte_index] = self.buf[byte_index] & ~(0x80 >> (x & 7))
+
+    def _row(self, y:int) -> int:
+        """Returns row y as an int whose most significant of width bits is the left-most pixel"""
+        nbytes:int = (self.width + 7) >> 3
+        offset:int = y * self.stride
+        return int.from_bytes(self.buf[offset:offset + nbytes], "big") >> ((nbytes * 8) - self.width)
+
+    def _set_row(self, y:int, value:int) -> None:
+        """Replaces row y with the width bits of value (see _row). The bits after the row in its last byte are left as they are, as in a view (see crop) they are pixels of the parent graphic."""
+        nbytes:int = (self.width + 7) >> 3
+        offset:int = y * self.stride
+        pad:int = (nbytes * 8) - self.width
+        value = value << pad
+        if pad > 0:
+            value = value | (self.buf[offset + nbytes - 1] & ((1 << pad) - 1))
+        self.buf[offset:offset + nbytes] = value.to_bytes(nbytes, "big")
 
-    def to_json(self) -> str:
+    def blit(self, src:"BitGraphic", x:int, y:int, mode:int = BLEND_OR) -> None:
+        """Draws another BitGraphic onto this one with its top-left corner at (x, y), one row at a time. Parts of src that fall outside of this BitGraphic (including negative offsets) are clipped. mode is one of the BLEND_ constants."""
 
-        # assemble bits as 1's and 0's
-        bitsbin:str = ""
-        for bit in self.bits:
-            if bit:
-                bitsbin = bitsbin + "1"
+        # clip to the overlapping rectangle
+        src_x:int = max(0, -x)
+        src_y:int = max(0, -y)
+        dest_x:int = max(0, x)
+        dest_y:int = max(0, y)
+        w:int = min(src.width - src_x, self.width - dest_x)
+        h:int = min(src.height - src_y, self.height - dest_y)
+        if w <= 0 or h <= 0:
+            return
+
+        src_shift:int = src.width - src_x - w # drops src columns right of the overlap
+        first:int = dest_x >> 3 # only the destination bytes under src are read and rewritten, however wide this graphic is
+        nbytes:int = ((dest_x + w + 7) >> 3) - first
+        dest_shift:int = (nbytes * 8) - (dest_x - (first * 8)) - w # moves the overlap into position in those bytes
+        region:int = ((1 << w) - 1) << dest_shift # the destination bits covered by src
+        full:bool = src_shift == 0 and src_x == 0 # src row used as-is, no masking needed
+        for row in range(0, h):
+            value:int = src._row(src_y + row)
+            if not full:
+                value = (value >> src_shift) & ((1 << w) - 1)
+            value = value << dest_shift
+            offset:int = ((dest_y + row) * self.stride) + first
+            dest:int = int.from_bytes(self.buf[offset:offset + nbytes], "big")
+            if mode == BLEND_OR:
+                if value == 0:
+                    continue
+                dest = dest | value
+            elif mode == BLEND_XOR:
+                if value == 0:
+                    continue
+                dest = dest ^ value
+            elif mode == BLEND_AND:
+                dest = dest & (value | ~region)
+            elif mode == BLEND_OVERWRITE:
+                dest = (dest & ~region) | value
+            elif mode == BLEND_MASK:
+                if value == 0:
+                    continue
+                dest = dest & ~value
             else:
-                bitsbin = bitsbin + "0"
+                raise Exception("Unknown blend mode " + str(mode) + ".")
+            self.buf[offset:offset + nbytes] = (dest & ((1 << (nbytes * 8)) - 1)).to_bytes(nbytes, "big")
+
+    def _compact(self) -> bool:
+        """Whether buf holds exactly the rows of this graphic, each padded to a whole byte with 0's (true of everything but views, see crop)"""
+        return self.stride == (self.width + 7) >> 3 and len(self.buf) == self.stride * self.height and isinstance(self.buf, bytearray)
+
+    def copy(self) -> "BitGraphic":
+        """Returns a copy with its own buffer (also turning a view, see crop, into a standalone graphic)"""
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.from_blank(self.width, self.height)
+        if self._compact():
+            ToReturn.buf[:] = self.buf
+        else:
+            for y in range(0, self.height):
+                ToReturn._set_row(y, self._row(y))
+        return ToReturn
+
+    def crop(self, x:int, y:int, width:int, height:int) -> "BitGraphic":
+        """
+        Returns the width x height area with its top-left corner at (x, y), clipped to this graphic.
+        If x is a multiple of 8, this is a view: it shares this graphic's buffer (no copy), so drawing on either one changes both. Otherwise, it is a copy.
+        """
+        width = min(width, self.width - x)
+        height = min(height, self.height - y)
+        if x < 0 or y < 0 or width < 0 or height < 0:
+            raise Exception("Cannot crop (" + str(x) + ", " + str(y) + ") outside of a BitGraphic of size " + str(self.width) + "x" + str(self.height) + ".")
+        ToReturn:BitGraphic = BitGraphic()
+        if x % 8 == 0:
+            ToReturn.buf = memoryview(self.buf)[(y * self.stride) + (x >> 3):]
+            ToReturn.stride = self.stride
+            ToReturn.width = width
+            ToReturn.height = height
+        else:
+            ToReturn.from_blank(width, height)
+            ToReturn.blit(self, -x, -y, BLEND_OVERWRITE)
+        return ToReturn
+
+    def invert(self) -> "BitGraphic":
+        """Returns a copy with every pixel switched (on to off, off to on)"""
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.from_blank(self.width, self.height)
+        mask:int = (1 << self.width) - 1
+        for y in range(0, self.height):
+            ToReturn._set_row(y, ~self._row(y) & mask)
+        return ToReturn
+
+    def flip_v(self) -> "BitGraphic":
+        """Returns a copy mirrored top to bottom"""
+        ToReturn:BitGraphic = self.copy()
+        source:bytearray = bytes(ToReturn.buf)
+        stride:int = ToReturn.stride
+        for y in range(0, self.height):
+            offset:int = (self.height - 1 - y) * stride
+            ToReturn.buf[y * stride:(y + 1) * stride] = source[offset:offset + stride]
+        return ToReturn
+
+    def flip_h(self) -> "BitGraphic":
+        """Returns a copy mirrored left to right"""
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.from_blank(self.width, self.height)
+        nbytes:int = ToReturn.stride
+        pad:int = (nbytes * 8) - self.width
+        table:bytearray = _REVERSED_BYTES
+        for y in range(0, self.height):
+
+            # reversing the order of the bytes, and the bits within each byte, reverses the whole row (and moves the padding to the front, where it drops off)
+            row:bytes = (self._row(y) << pad).to_bytes(nbytes, "big")
+            ToReturn.buf[y * nbytes:(y + 1) * nbytes] = (int.from_bytes(bytes([table[row[i]] for i in range(nbytes - 1, -1, -1)]), "big") << pad).to_bytes(nbytes, "big")
+        return ToReturn
+
+    def rotate(self, degrees:int) -> "BitGraphic":
+        """Returns a copy rotated clockwise by 90, 180 or 270 degrees"""
+        degrees = degrees % 360
+        if degrees == 0:
+            return self.copy()
+        if degrees == 180:
+            return self.flip_h().flip_v()
+        if degrees == 90:
+            return self._transpose().flip_h()
+        if degrees == 270:
+            return self._transpose().flip_v()
+        raise Exception("BitGraphic can only be rotated by a multiple of 90 degrees, not " + str(degrees) + ".")
+
+    def _transpose(self) -> "BitGraphic":
+        """Returns a copy mirrored across its top-left to bottom-right diagonal, 8x8 pixels at a time"""
+        source:BitGraphic = self if self._compact() else self.copy()
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.from_blank(self.height, self.width)
+        src:bytearray = source.buf
+        src_stride:int = source.stride
+        dest:bytearray = ToReturn.buf
+        dest_stride:int = ToReturn.stride
+        for band in range(0, (self.height + 7) >> 3): # 8 rows of the source, which become a column of bytes in the destination
+            rows:int = min(8, self.height - (band * 8))
+            for column in range(0, src_stride): # 8 columns of the source, which become 8 rows of the destination
+
+                # gather the 8x8 block (rows past the bottom are 0's)
+                block:int = 0
+                offset:int = (band * 8 * src_stride) + column
+                for r in range(0, rows):
+                    block = block | (src[offset] << (56 - (r * 8)))
+                    offset = offset + src_stride
+                if block == 0:
+                    continue
+
+                # transpose it and scatter it into the destination's rows
+                block = _transpose8(block)
+                for r in range(0, min(8, self.width - (column * 8))):
+                    dest[(((column * 8) + r) * dest_stride) + band] = (block >> (56 - (r * 8))) & 0xFF
+        return ToReturn
+
+    def scale(self, width:int, height:int) -> "BitGraphic":
+        """
+        Returns a copy resized to width x height (nearest neighbour), i.e. to derive the 24x24 characters from the 16x16 ones.
+        Each source row is scaled once, however many rows it becomes. Growing by a whole factor stretches each byte with a lookup table; shrinking by a whole factor takes every nth pixel.
+        """
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.from_blank(width, height)
+        if width == 0 or height == 0 or self.width == 0 or self.height == 0:
+            return ToReturn
+
+        # pick how each row is scaled across
+        nbytes:int = (self.width + 7) >> 3
+        pad:int = (nbytes * 8) - self.width
+        factor:int = width // self.width
+        table:list[int] = None
+        step:int = 0
+        columns:list[int] = None
+        if factor * self.width == width:
+            table = _STRETCHED_BYTES.get(factor)
+            if table == None:
+                table = []
+                for b in range(0, 256):
+                    stretched:int = 0
+                    for i in range(0, 8):
+                        stretched = stretched << factor
+                        if b & (0x80 >> i):
+                            stretched = stretched | ((1 << factor) - 1)
+                    table.append(stretched)
+                _STRETCHED_BYTES[factor] = table
+        elif (self.width // width) * width == self.width:
+            step = self.width // width
+        else:
+            columns = [(x * self.width) // width for x in range(0, width)]
+
+        source_y:int = -1
+        value:int = 0
+        for y in range(0, height):
+            sy:int = (y * self.height) // height
+            if sy != source_y: # rows repeated when growing are only scaled once
+                source_y = sy
+                row:bytes = (self._row(sy) << pad).to_bytes(nbytes, "big")
+                if table != None:
+                    value = 0
+                    for b in row:
+                        value = (value << (8 * factor)) | table[b]
+                    value = value >> (pad * factor)
+                else:
+                    bits:str = "".join([_BYTE_BITS[b] for b in row])
+                    if step != 0:
+                        bits = bits[0:self.width:step]
+                    else:
+                        bits = "".join([bits[x] for x in columns])
+                    value = int(bits, 2)
+            ToReturn._set_row(y, value)
+        return ToReturn
+
+    def to_framebuffer(self, format:int = framebuf.MONO_HLSB) -> framebuf.FrameBuffer:
+        """
+        Returns the graphic as a framebuf.FrameBuffer, ready to blit onto a display (or any other FrameBuffer).
+        The default MONO_HLSB FrameBuffer shares this BitGraphic's buffer (no copy), so it is created once, cached and always up to date (except for a view along the bottom of its parent, see crop, and a read-only buffer, see wrap, which are copied).
+        MONO_VLSB (the SSD1306 layout) is converted into a new buffer on every call, so later changes to the BitGraphic are not reflected in it.
+        """
+        if self._fb == None or self._fb_key[0] is not self.buf or self._fb_key[1] != self.width or self._fb_key[2] != self.height:
+            source:BitGraphic = self
+            if len(self.buf) < self.stride * self.height or not _writable(self.buf): # a view (see crop) reaching the bottom of its parent, where the buffer ends before its last full row would, or a read-only buffer (see wrap), which framebuf refuses
+                source = self.copy()
+            self._fb = framebuf.FrameBuffer(source.buf, self.width, self.height, framebuf.MONO_HLSB, source.stride * 8)
+            self._fb_key = (self.buf, self.width, self.height)
+        if format == framebuf.MONO_HLSB:
+            return self._fb
+        if format == framebuf.MONO_VLSB:
+            ToReturn = framebuf.FrameBuffer(bytearray(self.width * ((self.height + 7) // 8)), self.width, self.height, framebuf.MONO_VLSB)
+            ToReturn.blit(self._fb, 0, 0)
+            return ToReturn
+        raise Exception("BitGraphic can only be converted to a MONO_HLSB or MONO_VLSB FrameBuffer.")
+
+    @staticmethod
+    def wrap(buf, width:int, height:int, stride:int = None) -> "BitGraphic":
+        """
+        Returns a BitGraphic using an existing buffer for its pixels, without copying it: i.e. the bytearray behind a MONO_HLSB framebuf.FrameBuffer, the bytes of PIL.Image.tobytes() in mode "1", or a packed NumPy uint8 array (numpy.packbits(pixels, axis=1)).
+        Rows are stride bytes apart (by default, just enough bytes for width pixels), most significant bit first. Changes to either one show up in the other. A read-only buffer (like bytes) can be displayed and serialized, but not drawn on; framebuf needs a writable buffer, so to_framebuffer works on a copy of it.
+        """
+        nbytes:int = (width + 7) >> 3
+        if stride == None:
+            stride = nbytes
+        if not isinstance(buf, bytearray):
+            buf = memoryview(buf)
+            if hasattr(buf, "cast") and (buf.ndim != 1 or buf.format != "B"): # i.e. a 2D NumPy array
+                buf = buf.cast("B")
+        if stride < nbytes or (height > 0 and len(buf) < ((height - 1) * stride) + nbytes):
+            raise Exception("A buffer of " + str(len(buf)) + " bytes is too small for a " + str(width) + "x" + str(height) + " BitGraphic with " + str(stride) + " bytes per row.")
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.buf = buf
+        ToReturn.stride = stride
+        ToReturn.width = width
+        ToReturn.height = height
+        return ToReturn
+
+    def as_memoryview(self) -> memoryview:
+        """Returns a memoryview of the pixels as stored (rows stride bytes apart, most significant bit first), without copying them. memoryview(bg) does the same on Python 3.12 and later."""
+        return memoryview(self.buf)
+
+    def __buffer__(self, flags:int) -> memoryview:
+        return memoryview(self.buf)
+
+    @staticmethod
+    def from_pil(img:"PIL.Image.Image") -> "BitGraphic":
+        """Returns the pixels of a Pillow image as a BitGraphic, set (white) pixels on. Mode "1" images are taken as they are, in a single copy with no work per pixel; other modes are converted to mode "1" first."""
+        if img.mode != "1":
+            img = img.convert("1")
+        return BitGraphic.wrap(bytearray(img.tobytes()), img.size[0], img.size[1])
+
+    def to_pil(self) -> "PIL.Image.Image":
+        """Returns a mode "1" Pillow image of the pixels, on pixels set (white). Pillow always copies mode "1" pixels, but the copy is made in one go, with no work per pixel."""
+        import PIL.Image
+        source:BitGraphic = self
+        if len(self.buf) < self.stride * self.height: # a view along the bottom of its parent (see crop), whose buffer ends before its last full row would
+            source = self.copy()
+        return PIL.Image.frombuffer("1", (self.width, self.height), source.buf, "raw", "1", source.stride, 1)
+
+    @staticmethod
+    def from_numpy(array, width:int = None) -> "BitGraphic":
+        """
+        Returns a BitGraphic of a 2D NumPy array (rows of pixels).
+        With width, the array is taken to already be packed (uint8, 8 pixels per byte, most significant bit first, as numpy.packbits(pixels, axis=1) makes) and is shared, not copied. Otherwise, every non-zero element is an on pixel, and they are packed (in one go, with no work per pixel in Python).
+        """
+        import numpy
+        if width != None:
+            if array.dtype != numpy.uint8 or array.ndim != 2 or not array.flags["C_CONTIGUOUS"]:
+                raise Exception("A packed array must be a 2D, C-contiguous array of uint8.")
+            return BitGraphic.wrap(array, width, array.shape[0], array.shape[1])
+        return BitGraphic.wrap(bytearray(numpy.packbits(array != 0, axis=1).tobytes()), array.shape[1], array.shape[0])
+
+    def to_numpy(self, packed:bool = True):
+        """
+        Returns the pixels as a 2D NumPy array. Packed (the default), it is an array of uint8 rows of the bytes holding the pixels, sharing this BitGraphic's buffer (changes to either show up in the other).
+        With packed=False, it is a new height x width array of bools.
+        """
+        import numpy
+        nbytes:int = (self.width + 7) >> 3
+        rows = numpy.ndarray((self.height, nbytes), dtype=numpy.uint8, buffer=self.buf, strides=(self.stride, 1))
+        if packed:
+            return rows
+        return numpy.unpackbits(rows, axis=1)[:, 0:self.width].astype(bool)
+
+    @property
+    def bits(self) -> "_BitsView":
+        """A list-like view of every bit, row by row (left to right, top to bottom). Kept for compatibility with code written against the old list[bool] storage."""
+        return _BitsView(self)
+
+    @bits.setter
+    def bits(self, values:list[bool]) -> None:
+        if len(values) != self.width * self.height:
+            raise Exception("Cannot assign " + str(len(values)) + " bits to a BitGraphic of size " + str(self.width) + "x" + str(self.height) + ".")
+        self.stride = (self.width + 7) >> 3 # width may have been set directly since the buffer was last allocated
+        self.buf = bytearray(self.stride * self.height)
+        i:int = 0
+        for y in range(0, self.height):
+            for x in range(0, self.width):
+                if values[i]:
+                    self.set_bit(x, y, True)
+                i = i + 1
+
+    def to_json(self, encoding:str = ENCODING_BIN) -> str:
+        """Serializes to JSON. By default "bits" holds one "0" or "1" per pixel; pass ENCODING_HEX or ENCODING_BASE64 for a much shorter "bits" string."""
+        return "".join(self._json_chunks(encoding))
+
+    def to_stream(self, f, encoding:str = ENCODING_BIN) -> None:
+        """Writes the JSON serialization to an open file object piece by piece, without assembling the full JSON string in memory"""
+        for chunk in self._json_chunks(encoding):
+            f.write(chunk)
 
-        ToReturn = {"bits": bitsbin, "width": self.width, "height": self.height}
-        return json.dumps(ToReturn)
+    def _json_chunks(self, encoding:str):
+        """Yields the JSON serialization in pieces (one row at a time for the bits)"""
+        if not self._compact(): # a view: serialize a standalone copy, without the parent's pixels around it
+            yield from self.copy()._json_chunks(encoding)
+            return
+        nbytes:int = (self.width + 7) // 8 # bytes actually holding pixels in each row
+        if encoding == ENCODING_BIN:
+            yield '{"bits": "'
+            table:list[str] = _BYTE_BITS
+            for y in range(0, self.height):
+                offset:int = y * self.stride
+                row:str = "".join([table[b] for b in self.buf[offset:offset + nbytes]])
+                yield row[0:self.width]
+            yield '", "width": ' + str(self.width) + ', "height": ' + str(self.height) + "}"
+        elif encoding == ENCODING_HEX or encoding == ENCODING_BASE64:
+            yield '{"encoding": "' + encoding + '", "width": ' + str(self.width) + ', "height": ' + str(self.height) + ', "bits": "'
+            rows_per_chunk:int = 1
+            if encoding == ENCODING_BASE64:
+                rows_per_chunk = 3 # base64 pieces must cover a multiple of 3 bytes to concatenate cleanly
+                while rows_per_chunk * nbytes < 48 and rows_per_chunk < self.height:
+                    rows_per_chunk = rows_per_chunk + 3
+            for y in range(0, self.height, rows_per_chunk):
+                rows:bytearray = bytearray()
+                for ry in range(y, min(y + rows_per_chunk, self.height)):
+                    rows.extend(self.buf[ry * self.stride:(ry * self.stride) + nbytes])
+                if encoding == ENCODING_HEX:
+                    yield binascii.hexlify(rows).decode()
+                else:
+                    yield binascii.b2a_base64(rows).decode().strip()
+            yield '"}'
+        else:
+            raise Exception("Unknown BitGraphic JSON encoding '" + str(encoding) + "'.")
     
     def from_blank(self, width:int, height:int) -> None:
         """Initializes blank slate with desired width and height"""
         self.width = width
         self.height = height
         
-        # create enough bits to suffice
-        self.bits.clear()
-        for x in range(0, self.width * self.height):
-            self.bits.append(False)
+        # create enough bytes to suffice, each row padded out to a full byte
+        self.stride = (width + 7) // 8
+        self.buf = bytearray(self.stride * height)
     
     def from_json(self, jsond:str|dict) -> None:
 
@@ -65,57 +726,402 @@ class BitGraphic:
         if type(obj) == str:
             obj = json.loads(obj)
 
-        # deserialize bits
-        self.bits.clear()
-        for c in obj["bits"]:
-            if c == "0":
-                self.bits.append(False)
-            elif c == "1":
-                self.bits.append(True)
+        self._load_bits([obj["bits"]], obj.get("encoding", ENCODING_BIN), obj["width"], obj["height"])
+
+    def from_stream(self, f) -> None:
+        """Deserializes JSON from an open file object, decoding the bits as they are read instead of loading the full JSON string into memory"""
+        js:_JsonStream = _JsonStream(f)
+        if js.next_char() != "{":
+            raise Exception("JSON-serialized BitGraphic must be an object.")
+        width:int = None
+        height:int = None
+        encoding:str = None
+        decoded = None # (bits, count) for bin, bytes for hex/base64, or the text itself (see below)
+        bits_first:bool = False # whether "bits" came before "encoding", so was decoded as bin before the encoding was known
+        while True:
+            c:str = js.next_char()
+            if c == "}":
+                break
+            if c == ",":
+                continue
+            if c != '"':
+                raise Exception("Unexpected character '" + c + "' in JSON-serialized BitGraphic.")
+            key:str = "".join(js.string_chunks())
+            if js.next_char() != ":":
+                raise Exception("Expected ':' after key '" + key + "' in JSON-serialized BitGraphic.")
+            c = js.next_char()
+            if c == '"' and key == "bits":
+                if encoding == None: # to_json writes "encoding" first, but other writers (sort_keys for one) may not: read as bin, keeping the text if it is not
+                    bits_first = True
+                    decoded = _pack_bitstring(js.string_chunks(), True)
+                elif encoding == ENCODING_BIN:
+                    decoded = _pack_bitstring(js.string_chunks())
+                else:
+                    decoded = _decode_packed(js.string_chunks(), encoding)
+            elif c == '"' and key == "encoding":
+                encoding = "".join(js.string_chunks())
+            elif key == "width" or key == "height":
+                if c < "0" or c > "9":
+                    raise Exception("The '" + key + "' property of a JSON-serialized BitGraphic must be a whole number.")
+                if key == "width":
+                    width = js.read_number(c)
+                else:
+                    height = js.read_number(c)
             else:
-                raise Exception("Character '" + c + "' in JSON-serializes 'bits' property is not a valid 0 or 1.")
-        
-        # width and height
-        self.width = obj["width"]
-        self.height = obj["height"]
+                js.skip_value(c)
+        if width == None or height == None or decoded == None:
+            raise Exception("JSON-serialized BitGraphic must contain 'bits', 'width' and 'height'.")
+        if encoding == None:
+            encoding = ENCODING_BIN
+        if bits_first and type(decoded) == str:
+            self._load_bits([decoded], encoding, width, height)
+        elif bits_first and encoding != ENCODING_BIN: # bits that happened to be all 0's and 1's: rebuild the text to decode it properly
+            packed, nbits = decoded
+            self._load_bits(["".join([_BYTE_BITS[b] for b in packed])[0:nbits]], encoding, width, height)
+        else:
+            self._load_bits(None, encoding, width, height, decoded)
+
+    def _load_bits(self, chunks, encoding:str, width:int, height:int, decoded = None) -> None:
+        """Fills the buffer from the serialized "bits" string pieces (or their already-decoded form)"""
+        self.from_blank(width, height)
+        if encoding == ENCODING_BIN:
+            packed, nbits = _pack_bitstring(chunks) if decoded == None else decoded
+            if nbits != width * height:
+                raise Exception("JSON-serialized 'bits' property contains " + str(nbits) + " bits but a " + str(width) + "x" + str(height) + " BitGraphic requires " + str(width * height) + ".")
+            if width % 8 == 0: # flat bits are already row-aligned
+                self.buf = packed
+                return
+            pad:int = (self.stride * 8) - width
+            mask:int = (1 << width) - 1
+            for y in range(0, height):
+                first:int = y * width # index of the row's first bit in the flat bits
+                start:int = first >> 3
+                end:int = (first + width + 7) >> 3
+                value:int = int.from_bytes(packed[start:end], "big") >> ((end * 8) - (first + width))
+                self.buf[y * self.stride:(y + 1) * self.stride] = ((value & mask) << pad).to_bytes(self.stride, "big")
+        elif encoding == ENCODING_HEX or encoding == ENCODING_BASE64:
+            packed = _decode_packed(chunks, encoding) if decoded == None else decoded
+            if len(packed) != len(self.buf):
+                raise Exception("JSON-serialized 'bits' property decodes to " + str(len(packed)) + " bytes but a " + str(width) + "x" + str(height) + " BitGraphic requires " + str(len(self.buf)) + ".")
+            self.buf = packed
+        else:
+            raise Exception("Unknown BitGraphic JSON encoding '" + str(encoding) + "'.")
+
+    def to_bytes(self, rle:bool = None) -> bytes:
+        """
+        Serializes to the compact binary format: a 7-byte header (magic "BG", format version, width and height as little-endian 16-bit integers) followed by the packed rows.
+        Mostly empty graphics are smaller run-length encoded (see SparseBitGraphic), which is used instead whenever it is smaller, unless rle is True (always) or False (never).
+        """
+        if rle != False:
+            encoded:bytearray = _rle_encode(SparseBitGraphic(self).rows, self.width, self.height)
+            if rle == True or len(encoded) < BINARY_HEADER_SIZE + (((self.width + 7) >> 3) * self.height):
+                return bytes(encoded)
+        header = bytes([0x42, 0x47, BINARY_VERSION, self.width & 0xFF, self.width >> 8, self.height & 0xFF, self.height >> 8])
+        if not self._compact():
+            return header + bytes(self.copy().buf)
+        return header + bytes(self.buf)
+
+    def from_bytes(self, data:bytes) -> None:
+        """Deserializes from the compact binary format produced by to_bytes"""
+        width, height = _parse_header(data)
+        if data[2] & BINARY_FLAG_RLE:
+            sparse:SparseBitGraphic = SparseBitGraphic()
+            sparse.from_bytes(data)
+            sparse._fill(self)
+            return
+        self.from_blank(width, height)
+        payload = memoryview(data)[BINARY_HEADER_SIZE:BINARY_HEADER_SIZE + len(self.buf)]
+        if len(payload) != len(self.buf):
+            raise Exception("Binary BitGraphic data is truncated: expected " + str(len(self.buf)) + " bytes of pixels but found " + str(len(payload)) + ".")
+        self.buf[:] = payload
     
     def from_file(self, path:str) -> None:
-        f = open(path, "r")
-        txt:str = f.read()
-        self.from_json(txt)
+        """Loads from a file, detecting whether it is in the binary format or JSON"""
+        f = open(path, "rb")
+        header:bytes = f.read(BINARY_HEADER_SIZE)
+        if header[0:2] == b"BG": # binary: decode the pixels straight into the buffer
+            width, height = _parse_header(header)
+            if header[2] & BINARY_FLAG_RLE:
+                self.from_bytes(header + f.read())
+                f.close()
+                return
+            self.from_blank(width, height)
+            read:int = f.readinto(self.buf)
+            f.close()
+            if read != len(self.buf):
+                raise Exception("Binary BitGraphic file '" + path + "' is truncated: expected " + str(len(self.buf)) + " bytes of pixels but found " + str(read) + ".")
+        else: # JSON, decoded as it streams in
+            f.seek(0)
+            self.from_stream(f)
+            f.close()
+
+    def to_file(self, path:str) -> None:
+        """Saves to a file. Paths ending in ".bg" are written in the compact binary format, anything else as JSON."""
+        if path.endswith(BINARY_EXTENSION):
+            f = open(path, "wb")
+            f.write(self.to_bytes())
+        else:
+            f = open(path, "w")
+            f.write(self.to_json())
+        f.close()
+
+
+class _BitsView:
+    """Read/write list-like view over the packed bits of a BitGraphic, indexed the same way the old list[bool] was: (y * width) + x"""
+
+    def __init__(self, bg:BitGraphic) -> None:
+        self._bg = bg
+
+    def __len__(self) -> int:
+        return self._bg.width * self._bg.height
+
+    def __getitem__(self, index:int|slice) -> bool|list[bool]:
+        if type(index) == slice:
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("bit index out of range")
+        return self._bg.bit(index % self._bg.width, index // self._bg.width)
+
+    def __setitem__(self, index:int, value:bool) -> None:
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("bit index out of range")
+        self._bg.set_bit(index % self._bg.width, index // self._bg.width, value)
+
+    def __iter__(self):
+        bg = self._bg
+        for y in range(0, bg.height):
+            for x in range(0, bg.width):
+                yield bg.bit(x, y)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+
+
+class SparseBitGraphic:
+    """
+    A BitGraphic stored as the spans of "on" pixels in each row, instead of every pixel. For mostly empty graphics (icons, flattened groups), this is smaller, and loading and drawing one takes time in proportion to its spans rather than its area.
+    It can be drawn with BitGraphicDisplay.display, blitted onto a BitGraphic and added to a BitGraphicGroup like a BitGraphic. Saved with to_bytes (or BitGraphic.to_bytes, whenever it is smaller), it is run-length encoded.
+    """
+
+    def __init__(self, bg:BitGraphic = None, path:str = None) -> None:
+        self.width:int = 0
+        self.height:int = 0
+        self.rows:list = [] # for each row, the x and length of each span of on pixels, flattened: [x1, length1, x2, length2, ...]
+
+        if bg != None:
+            self.from_BitGraphic(bg)
+        if path != None:
+            self.from_file(path)
+
+    @property
+    def spans(self) -> int:
+        """Total number of spans of on pixels"""
+        ToReturn:int = 0
+        for row in self.rows:
+            ToReturn = ToReturn + (len(row) >> 1)
+        return ToReturn
+
+    def bit(self, x:int, y:int) -> bool:
+        """Returns the bit value for a given coordinate"""
+        row = self.rows[y]
+        for i in range(0, len(row), 2):
+            if row[i] > x:
+                return False
+            if x < row[i] + row[i + 1]:
+                return True
+        return False
+
+    def _row(self, y:int) -> int:
+        """Returns row y as an int whose most significant of width bits is the left-most pixel (like BitGraphic._row, so it can be blitted)"""
+        ToReturn:int = 0
+        row = self.rows[y]
+        for i in range(0, len(row), 2):
+            ToReturn = ToReturn | (((1 << row[i + 1]) - 1) << (self.width - row[i] - row[i + 1]))
+        return ToReturn
+
+    def from_BitGraphic(self, bg:BitGraphic) -> None:
+        """Finds the spans of on pixels in every row of a BitGraphic"""
+        self.width = bg.width
+        self.height = bg.height
+        self.rows = []
+        nbytes:int = (bg.width + 7) >> 3
+        last_mask:int = (0xFF << ((nbytes * 8) - bg.width)) & 0xFF # the bits of the last byte that are in the row (in a view, the rest belong to its parent)
+        for y in range(0, bg.height):
+            if bg._row(y) == 0:
+                self.rows.append(_NO_SPANS)
+                continue
+
+            # scan the row a byte at a time (int.bit_length would be quicker, but MicroPython doesn't have it), only looking at the bits of bytes that are neither empty nor full
+            spans:list[int] = []
+            start:int = -1 # where the span being scanned started, -1 between spans
+            offset:int = y * bg.stride
+            for i in range(0, nbytes):
+                byte:int = bg.buf[offset + i]
+                if i == nbytes - 1:
+                    byte = byte & last_mask
+                if byte == 0:
+                    if start >= 0:
+                        spans.append(start)
+                        spans.append((i * 8) - start)
+                        start = -1
+                elif byte == 0xFF:
+                    if start < 0:
+                        start = i * 8
+                else:
+                    for bit in range(0, 8):
+                        if byte & (0x80 >> bit):
+                            if start < 0:
+                                start = (i * 8) + bit
+                        elif start >= 0:
+                            spans.append(start)
+                            spans.append((i * 8) + bit - start)
+                            start = -1
+            if start >= 0:
+                spans.append(start)
+                spans.append(self.width - start)
+            self.rows.append(spans)
+
+    def to_BitGraphic(self) -> BitGraphic:
+        """Returns the graphic with every pixel stored (a BitGraphic)"""
+        ToReturn:BitGraphic = BitGraphic()
+        self._fill(ToReturn)
+        return ToReturn
+
+    def _fill(self, bg:BitGraphic) -> None:
+        bg.from_blank(self.width, self.height)
+        for y in range(0, self.height):
+            if len(self.rows[y]) > 0:
+                bg._set_row(y, self._row(y))
+
+    def to_framebuffer(self, format:int = framebuf.MONO_HLSB) -> framebuf.FrameBuffer:
+        """Returns the graphic as a new framebuf.FrameBuffer (see BitGraphic.to_framebuffer)"""
+        return self.to_BitGraphic().to_framebuffer(format)
+
+    def to_bytes(self) -> bytes:
+        """Serializes to the binary format, run-length encoded"""
+        return bytes(_rle_encode(self.rows, self.width, self.height))
+
+    def from_bytes(self, data:bytes) -> None:
+        """Deserializes from the binary format, run-length encoded or not"""
+        width, height = _parse_header(data)
+        if data[2] & BINARY_FLAG_RLE:
+            self.width = width
+            self.height = height
+            self.rows = _rle_decode(data, height)
+        else:
+            bg:BitGraphic = BitGraphic()
+            bg.from_bytes(data)
+            self.from_BitGraphic(bg)
+
+    def from_file(self, path:str) -> None:
+        """Loads from a file, in the binary format (run-length encoded or not) or JSON"""
+        f = open(path, "rb")
+        header:bytes = f.read(BINARY_HEADER_SIZE)
+        if header[0:2] == b"BG" and header[2] & BINARY_FLAG_RLE:
+            self.from_bytes(header + f.read())
+            f.close()
+            return
+        f.close()
+        self.from_BitGraphic(BitGraphic(path=path))
+
+    def to_file(self, path:str) -> None:
+        """Saves to a file in the binary format, run-length encoded (the path should end in ".bg")"""
+        f = open(path, "wb")
+        f.write(self.to_bytes())
+        f.close()
 
 
+def load(path:str) -> "BitGraphic|SparseBitGraphic":
+    """Loads a graphic from a file in whichever form it was stored: a SparseBitGraphic if it was saved run-length encoded (because that was smaller), otherwise a BitGraphic"""
+    f = open(path, "rb")
+    header:bytes = f.read(BINARY_HEADER_SIZE)
+    f.close()
+    if header[0:2] == b"BG" and len(header) == BINARY_HEADER_SIZE and header[2] & BINARY_FLAG_RLE:
+        return SparseBitGraphic(path=path)
+    return BitGraphic(path=path)
+
 
 class BitGraphicGroup:
     def __init__(self) -> None:
-        self.BitGraphics:list[tuple[BitGraphic, int, int]] = [] # tuple of (BitGraphic, width, height)
+        self.BitGraphics:list[tuple[BitGraphic, int, int, int]] = [] # tuple of (BitGraphic, x, y, blend mode)
+
+        # bounds of the group, kept up to date as BitGraphics are added, removed and moved (None while empty)
+        self._left:int = None
+        self._right:int = None
+        self._top:int = None
+        self._bottom:int = None
 
-    def add(self, bg:BitGraphic, relative_x:int, relative_y:int) -> None:
-        """Add a BitGraphic to the group with a relative position to the group"""
-        self.BitGraphics.append((bg, relative_x, relative_y))
+    def add(self, bg:BitGraphic, relative_x:int, relative_y:int, mode:int = BLEND_OR) -> None:
+        """Add a BitGraphic to the group with a relative position to the group. mode (one of the BLEND_ constants) determines how it is combined with the graphics added before it when flattened."""
+        self.BitGraphics.append((bg, relative_x, relative_y, mode))
+        self._extend_bounds(bg, relative_x, relative_y)
+
+    def remove(self, bg:BitGraphic) -> None:
+        """Removes a BitGraphic from the group"""
+        index:int = self._index(bg)
+        bgp = self.BitGraphics.pop(index)
+        if self._on_edge(bgp):
+            self._recalculate_bounds()
+
+    def move(self, bg:BitGraphic, relative_x:int, relative_y:int) -> None:
+        """Moves a BitGraphic that is already in the group to a new relative position"""
+        index:int = self._index(bg)
+        bgp = self.BitGraphics[index]
+        self.BitGraphics[index] = (bgp[0], relative_x, relative_y, bgp[3] if len(bgp) > 3 else BLEND_OR)
+        if self._on_edge(bgp):
+            self._recalculate_bounds()
+        else:
+            self._extend_bounds(bg, relative_x, relative_y)
+
+    def _index(self, bg:BitGraphic) -> int:
+        """Returns the position of a BitGraphic in the group"""
+        for i in range(0, len(self.BitGraphics)):
+            if self.BitGraphics[i][0] is bg:
+                return i
+        raise Exception("BitGraphic is not in this BitGraphicGroup.")
+
+    def _extend_bounds(self, bg:BitGraphic, x:int, y:int) -> None:
+        """Grows the bounds to include a BitGraphic at the given position"""
+        if self._left == None or x < self._left:
+            self._left = x
+        if self._right == None or x + bg.width > self._right:
+            self._right = x + bg.width # x shift + width of the graphic
+        if self._top == None or y < self._top:
+            self._top = y
+        if self._bottom == None or y + bg.height > self._bottom:
+            self._bottom = y + bg.height # y shift + height of graphic
+
+    def _on_edge(self, bgp:tuple) -> bool:
+        """Returns True if a (BitGraphic, x, y) entry touches the bounds, meaning the bounds may shrink without it"""
+        return bgp[1] == self._left or bgp[1] + bgp[0].width == self._right or bgp[2] == self._top or bgp[2] + bgp[0].height == self._bottom
+
+    def _recalculate_bounds(self) -> None:
+        """Rescans every BitGraphic to determine the bounds"""
+        self._left = None
+        self._right = None
+        self._top = None
+        self._bottom = None
+        for bgp in self.BitGraphics:
+            self._extend_bounds(bgp[0], bgp[1], bgp[2])
 
     @property
     def left(self) -> int:
         """Returns the left-most position (min x)"""
-        left_most:int = None
-        for bgp in self.BitGraphics:
-            if left_most == None or bgp[1] < left_most:
-                left_most = bgp[1]
-        if left_most == None:
-            left_most = 0
-        return left_most
+        if self._left == None:
+            return 0
+        return self._left
     
     @property
     def right(self) -> int:
         """Returns the right-most position (max x)"""
-        right_most:int = None
-        for bgp in self.BitGraphics:
-            right:int = bgp[1] + bgp[0].width # x shift + width of the graphic
-            if right_most == None or right > right_most:
-                right_most = right
-        if right_most == None:
-            right_most = 0
-        return right_most
+        if self._right == None:
+            return 0
+        return self._right
 
     @property
     def width(self) -> int:
@@ -125,25 +1131,16 @@ class BitGraphicGroup:
     @property
     def top(self) -> int:
         """Returns the top-most position (min y)"""
-        top_most:int = None
-        for bgp in self.BitGraphics:
-            if top_most == None or bgp[2] < top_most:
-                top_most = bgp[2]
-        if top_most == None:
-            top_most = 0
-        return top_most
+        if self._top == None:
+            return 0
+        return self._top
     
     @property
     def bottom(self) -> int:
         """Returns the bottom-most position (max y)"""
-        bottom_most:int = None
-        for bgp in self.BitGraphics:
-            bottom:int = bgp[2] + bgp[0].height # y shift + height of graphic
-            if bottom_most == None or bottom > bottom_most:
-                bottom_most = bottom
-        if bottom_most == None:
-            bottom_most = 0
-        return bottom_most
+        if self._bottom == None:
+            return 0
+        return self._bottom
     
     @property
     def height(self) -> int:
@@ -154,256 +1151,1077 @@ class BitGraphicGroup:
         """Combines all BitGraphics into a single BitGraphic."""
 
         ToReturn:BitGraphic = BitGraphic()
-        ToReturn.width = self.width
-        ToReturn.height = self.height
-        ToReturn.bits.clear()
-        
-        for y in range (self.top, self.bottom):
-            for x in range(self.left, self.right):
+        ToReturn.from_blank(self.width, self.height)
 
-                # declare a variable for what this bit will end up being
-                ThisBit:bool = False
-                
-                # is this pixel covered by a BitGraphic?
-                for bgp in self.BitGraphics:
-                    if x >= bgp[1] and x < bgp[1] + bgp[0].width and y >= bgp[2] and y < bgp[2] + bgp[0].height: # within the bounds
-                        relative_x:int = x - bgp[1]
-                        relative_y:int = y - bgp[2]
-                        value:bool = bgp[0].bit(relative_x, relative_y)
-                        if value:
-                            ThisBit = True # set to true if it is filled in
-
-                # add it!
-                ToReturn.bits.append(ThisBit)
+        # draw each BitGraphic, in the order they were added, relative to the top left of the group
+        left:int = self.left
+        top:int = self.top
+        for bgp in self.BitGraphics:
+            ToReturn.blit(bgp[0], bgp[1] - left, bgp[2] - top, bgp[3] if len(bgp) > 3 else BLEND_OR)
         
         return ToReturn
 
 
 
+class _LRUCache:
+    """Least-recently-used cache bounded by a budget of bytes, with hit/miss/eviction counters"""
 
-# Only if on pi
-if sys.platform == "rp2":
-    import ssd1306
-    import machine
-    import json
+    def __init__(self, budget:int) -> None:
+        self.budget:int = budget # the most bytes held at once
+        self.resident:int = 0 # bytes currently held
+        self.hits:int = 0
+        self.misses:int = 0
+        self.evictions:int = 0
+        self._entries:dict = {} # key -> (value, size)
+        self._order:list = [] # keys, least recently used first
 
-    class BitGraphicDisplay:
+    def __len__(self) -> int:
+        return len(self._entries)
 
-        def __init__(self, i2c:machine.I2C, width:int, height:int) -> None:
-            self._width = width
-            self._height = height
-            self.oled = ssd1306.SSD1306_I2C(width, height, i2c)
+    def __contains__(self, key) -> bool:
+        return key in self._entries
 
-        def clear(self) -> None:
-            self.oled.fill(0)
-
-        def show(self) -> None:
-            self.oled.show()
-
-        def display(self, bg:BitGraphic, x:int=None, y:int=None, center:tuple[int|float, int|float] = None) -> None:
-
-            # if  they did not specify either x,y or center, throw error
-            if (x == None or y == None) and center == None:
-                #raise Exception("You must specify either a fixed (x,y) point or a relative center point when displaying a BitGraphic! You specified neither.")
-                x = 0 # default to 0
-                y = 0 # default to 0
-
-            # if center was not null, calculate x and y automatically, centering on that point
-            if center != None:
-
-                # firstly, if center was provided as a float (between 0 and 1), they are specifying it as a percentage of the width and height. If it was an int, it is absolute
-                if type(center[0] == float):
-                    nc0 = int(round(center[0] * self._width, 0))
-                    center = (nc0, center[1])
-                if type(center[1] == float):
-                    nc1 = int(round(center[1] * self._height, 0))
-                    center = (center[0], nc1)
-
-                # calculate center point
-                x = center[0] - int(round(bg.width / 2, 0))
-                y = center[1] - int(round(bg.height / 2, 0))
-
-            # display BitGraphic
-            for yt in range(0, bg.height):
-                for xt in range(0, bg.width):
-
-                    # determine index in the bits array
-                    BitIndex:int = (yt * bg.width) + xt
-
-                    # determine pixel position
-                    pix_x:int = x + xt
-                    pix_y:int = y + yt
-                    
-                    if bg.bits[BitIndex] == False:
-                        self.oled.pixel(pix_x, pix_y, 0)
-                    elif bg.bits[BitIndex] == True:
-                        self.oled.pixel(pix_x, pix_y, 1)
-        
-    class Typewriter:
-
-        def __init__(self) -> None:
-            self.characters:list[tuple[str, BitGraphic]] = [] # character, graphic pair
-
-            # add characters
-            self.add_character("0", BitGraphic(jsond={"bits": "0000011111100000000011111111000000011111111110000011111001111100001111000011110000111100001111000011110000111100001111000011110000111100001111000011110000111100001111000011110000111100001111000011111001111100000111111111100000001111111100000000011111100000", "width": 16, "height": 16}))
-            self.add_character("1", BitGraphic(jsond={"bits": "0000000011110000000000111111000000000111111100000000111111110000000011110111000000000110011100000000000001110000000000000111000000000000011100000000000001110000000000000111000000000000011100000000000001110000000000000111000000000000011100000000000001110000", "width": 16, "height": 16}))
-            self.add_character("2", BitGraphic(jsond={"bits": "0000111111100000000111111111000000011111111110000011111001111000001111000011110000000000001111000000000001111000000000001111100000000001111100000000001111100000000001111100000000001111100000000001111100000000000111111111110000011111111111000001111111111100", "width": 16, "height": 16}))
-            self.add_character("3", BitGraphic(jsond={"bits": "0000011111100000000111111111100000011111111110000001110001111000000000000011100000000000001110000000000011111000000000011111000000000001111100000000000011111000000000000011100000000000001110000001110001111000000111111111100000011111111110000000011111100000", "width": 16, "height": 16}))
-            self.add_character("4", BitGraphic(jsond={"bits": "0000000001111100000000001111110000000001111111000000001111111100000001111111110000000111101111000000111110111100000111110011110000111110001111000111111111111110011111111111111001111111111111100111111111111110000000000011100000000000001111000000000000111100", "width": 16, "height": 16}))
-            self.add_character("5", BitGraphic(jsond={"bits": "0001111111111100001111111111110000111111111111000011110000000000001111000000000000111100000000000011111111100000001111111111000000011111111110000000000001111000000000000011110000000000001111000000000001111000001111111111100000111111111100000011111111100000", "width": 16, "height": 16}))
-            self.add_character("6", BitGraphic(jsond={"bits": "0000011111100000000011111111000000011111111110000001111001111000001111000011110000111111110110000011111111100000001111111111000000111111111110000011111001111000001111000011110000111100001111000001111001111000000111111111100000001111111100000000011111100000", "width": 16, "height": 16}))
-            self.add_character("7", BitGraphic(jsond={"bits": "0001111111111000000111111111100000011111111110000000000001111000000000000111100000000000111100000000000011110000000000001111000000000000111000000000000111100000000000011110000000000001111000000000001111000000000000111100000000000011110000000000001110000000", "width": 16, "height": 16}))
-            self.add_character("8", BitGraphic(jsond={"bits": "0000011111100000000011111111000000011111111110000001111001111000000111100111100000011110011110000001111111111000000011111111000000001111111100000001111111111000000111100111100000011110011110000001111001111000000111111111100000001111111100000000011111100000", "width": 16, "height": 16}))
-            self.add_character("9", BitGraphic(jsond={"bits": "0000011111100000000011111111000000011111111110000001111001111000001111000011110000111100001111000001111001111100000111111111110000001111111111000000011111111100000110111111110000111100001111000001111001111000000111111111100000001111111100000000011111100000", "width": 16, "height": 16}))
-            self.add_character("a", BitGraphic(jsond={"bits": "0000001111000000000000111100000000000111111000000000011111100000000011111111000000001111111100000000111111110000000111100111100000011110011110000001111111111000001111111111110000111111111111000111100000011110011110000001111001111000000111101111000000001111", "width": 16, "height": 16}))
-            self.add_character("b", BitGraphic(jsond={"bits": "0011111111110000001111111111100000111111111111000011110000111100001111000011110000111100001111000011111111111000001111111111000000111111111100000011111111111000001111000011110000111100001111000011110000111100001111111111110000111111111110000011111111110000", "width": 16, "height": 16}))
-            self.add_character("c", BitGraphic(jsond={"bits": "0000011111111000000011111111110000011111111111100011111000011110011111000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111100000000000011111000011110000111111111111000001111111111000000011111111000", "width": 16, "height": 16}))
-            self.add_character("d", BitGraphic(jsond={"bits": "0111111111000000011111111111000001111111111110000111100011111000011110000011110001111000001111000111100000011110011110000001111001111000000111100111100000011110011110000011110001111000001111000111100011111000011111111111100001111111111100000111111111000000", "width": 16, "height": 16}))
-            self.add_character("e", BitGraphic(jsond={"bits": "0001111111111000000111111111100000011111111110000001110000000000000111000000000000011100000000000001111111111000000111111111100000011111111110000001111111111000000111000000000000011100000000000001110000000000000111111111100000011111111110000001111111111000", "width": 16, "height": 16}))
-            self.add_character("f", BitGraphic(jsond={"bits": "0001111111111000000111111111100000011111111110000001110000000000000111000000000000011100000000000001111111111000000111111111100000011111111110000001111111111000000111000000000000011100000000000001110000000000000111000000000000011100000000000001110000000000", "width": 16, "height": 16}))
-            self.add_character("g", BitGraphic(jsond={"bits": "0000111111110000000111111111110000111111111111000111110000111100011110000000000001111000000000001111000011111111111100001111111111110000111111111111000011111111011110000000111101111000000111110111110000111110001111111111111000011111111111000000111111110000", "width": 16, "height": 16}))
-            self.add_character("h", BitGraphic(jsond={"bits": "0011100000011100001110000001110000111000000111000011100000011100001110000001110000111000000111000011111111111100001111111111110000111111111111000011111111111100001110000001110000111000000111000011100000011100001110000001110000111000000111000011100000011100", "width": 16, "height": 16}))
-            self.add_character("i", BitGraphic(jsond={"bits": "0000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000", "width": 16, "height": 16}))
-            self.add_character("j", BitGraphic(jsond={"bits": "0000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100001111000011110000111100001111000011111001111100000111111111100000011111111110000000011111100000", "width": 16, "height": 16}))
-            self.add_character("k", BitGraphic(jsond={"bits": "0011100000111100001110000111100000111000111110000011100111110000001110111110000000111011110000000011111110000000001111111000000000111111110000000011111111100000001111011110000000111101111100000011100011110000001110000111100000111000011111000011100000111100", "width": 16, "height": 16}))
-            self.add_character("l", BitGraphic(jsond={"bits": "0011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111111111110000111111111111000011111111111100", "width": 16, "height": 16}))
-            self.add_character("m", BitGraphic(jsond={"bits": "1111000000001111111100000000111111111000000111111111100000011111111110000001111111111100001111111111110000111111111111000011111111111110011111111111111001111111111011111111011111101111111101111110111111110111111001111110011111100111111001111110001111000111", "width": 16, "height": 16}))
-            self.add_character("n", BitGraphic(jsond={"bits": "0111100000001110011111000000111001111100000011100111111000001110011111110000111001111111000011100111011110001110011101111100111001110011111011100111000111101110011100001111111001110000111111100111000001111110011100000011111001110000001111100111000000011110", "width": 16, "height": 16}))
-            self.add_character("o", BitGraphic(jsond={"bits": "0000111111110000001111111111110001111111111111100111110000111110111100000000111111110000000011111110000000000111111000000000011111100000000001111110000000000111111100000000111111110000000011110111110000111110011111111111111000111111111111000000111111110000", "width": 16, "height": 16}))
-            self.add_character("p", BitGraphic(jsond={"bits": "0011111111110000001111111111100000111111111111000011100000111100001111000011110000111100001111000011111111111100001111111111100000111111111100000011111111100000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000", "width": 16, "height": 16}))
-            self.add_character("q", BitGraphic(jsond={"bits": "0000111111110000001111111111110001111111111111100111110000111110111100000000111111110000000011111110000000000111111000000000011111100000000001111110000000010111111100000011111111110000011111110111110000111110011111111111111100111111111111110000111111110111", "width": 16, "height": 16}))
-            self.add_character("r", BitGraphic(jsond={"bits": "0011111111110000001111111111100000111111111111000011100000111100001111000011110000111000001111000011111111111100001111111111100000111111111100000011111111000000001110111100000000111101111000000011110111110000001111001111100000111100011110000011110000111100", "width": 16, "height": 16}))
-            self.add_character("s", BitGraphic(jsond={"bits": "0000111111111100000111111111110000011111111111000001110000000000001111000000000000111100000000000001111111000000000111111111000000001111111110000000001111111000000000000011110000000000001111000000000000111000001111111111100000111111111110000011111111110000", "width": 16, "height": 16}))
-            self.add_character("t", BitGraphic(jsond={"bits": "0111111111111110011111111111111001111111111111100000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000", "width": 16, "height": 16}))
-            self.add_character("u", BitGraphic(jsond={"bits": "0111100000011110011110000001111001111000000111100111100000011110011110000001111001111000000111100111100000011110011110000001111001111000000111100111100000011110011110000001111001111000000111100011110000111100001111111111110000011111111110000000111111110000", "width": 16, "height": 16}))
-            self.add_character("v", BitGraphic(jsond={"bits": "1111000000001111011100000000111001111000000111100111100000011110001111000011110000111100001111000011110000111100000111100111100000011110011110000000111001110000000011111111000000001111111100000000011111100000000001111110000000000111111000000000001111000000", "width": 16, "height": 16}))
-            self.add_character("w", BitGraphic(jsond={"bits": "1110001111000111111001111110011111100111111001111110011111100111111001111110011111101111111101111110111111110111111011111111011111111110011111111111111001111111111111100111111111111110011111111111110000111111111111000011111111111100001111111111110000111111", "width": 16, "height": 16}))
-            self.add_character("x", BitGraphic(jsond={"bits": "1111100000011111011110000001111001111100001111100011111001111100000111111111100000001111111100000000011111100000000001111110000000000111111000000000011111100000000011111111000000011111111110000011111001111100011111000011111001111000000111101111100000011111", "width": 16, "height": 16}))
-            self.add_character("y", BitGraphic(jsond={"bits": "1111100000011111011111000011111000111110011111000001111001111000000011111111000000001111111100000000011111100000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000000000111100000000000011110000000000001111000000", "width": 16, "height": 16}))
-            self.add_character("z", BitGraphic(jsond={"bits": "1111111111111111111111111111111111111111111111110000000000111111000000000111111000000000111111000000000111110000000000111110000000000111110000000000111110000000001111110000000001111110000000001111110000000000111111111111111111111111111111111111111111111111", "width": 16, "height": 16}))
-
-            # add space
-            space = BitGraphic()
-            space.from_blank(16, 16)
-            self.add_character(" ", space)
-
-        def add_character(self, character:str, bg:BitGraphic) -> None:
-            
-            # check if we already have a pair with this character and this size
-            for cp in self.characters:
-                if cp[0].lower() == character.lower():
-                    if cp[1].width == bg.width and cp[1].height == bg.height:
-                        raise Exception("Typewriter already has BitGraphic of size " + str(bg.width) + "x" + str(bg.height) + " representing the character '" + str(character) + "'.")
-                    
-            # if we got here, we don't have it exactly! So add it.
-            self.characters.append((character, bg))
-
-        def write(self, text:str, width:int, height:int) -> BitGraphic:
-            """Types text into a single BitGraphic."""
-
-            # list of all BitGraphics
-            ToReturn:BitGraphicGroup = BitGraphicGroup()
-            for c in text.lower():
-
-                # find appropriate one
-                CorrectBG:BitGraphic = None
-                for cbg in self.characters:
-                    if cbg[0].lower() == c.lower(): # validate it is the correct character
-                        if cbg[1].width == width and cbg[1].height == height: # validate the width and height match
-                            CorrectBG = cbg[1] # select the BitGraphic (at index 1)
-                
-                # if there wasn't one that was found, throw an error
-                if CorrectBG == None:
-                    
-                    # raise an exception if we don't have that character
-                    raise Exception("BitGraphic of character '" + str(c) + "' and size '" + str(width) + "x" + str(height) + " was not found in the list of available BitGraphic characters in the Typewriter.")
-                    
-                    # make a blank one
-                    # CorrectBG = BitGraphic()
-                    # CorrectBG.from_blank(width, height)
+    def get(self, key):
+        """Returns the cached value for key (marking it as recently used), or None"""
+        entry = self._entries.get(key)
+        if entry == None:
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        if self._order[-1] != key:
+            self._order.remove(key)
+            self._order.append(key)
+        return entry[0]
 
+    def put(self, key, value, size:int) -> None:
+        """Caches value under key, evicting the least recently used entries until it fits. Values larger than the whole budget are not cached."""
+        self.remove(key)
+        if size > self.budget:
+            return
+        while self.resident + size > self.budget:
+            self.evictions = self.evictions + 1
+            self.remove(self._order[0])
+        self._entries[key] = (value, size)
+        self._order.append(key)
+        self.resident = self.resident + size
 
-                # add it!
-                ToReturn.add(CorrectBG, ToReturn.width, 0)
+    def remove(self, key) -> None:
+        """Drops key from the cache if it is present"""
+        entry = self._entries.pop(key, None)
+        if entry != None:
+            self._order.remove(key)
+            self.resident = self.resident - entry[1]
 
-            # flatten and return
-            return ToReturn.flatten()
+    def clear(self) -> None:
+        """Drops every entry (the counters are kept)"""
+        self._entries.clear()
+        self._order.clear()
+        self.resident = 0
 
-else: # all other platforms (windows, linux, etc.)
-    
-    import PIL.Image
-    import os
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits"""
+        if self.hits + self.misses == 0:
+            return 0.0
+        return self.hits / (self.hits + self.misses)
+
+
+# bundle of many binary BitGraphics in a single file
+BUNDLE_EXTENSION:str = ".bgb"
+BUNDLE_VERSION:int = 0
+BUNDLE_HEADER_SIZE:int = 6 # "BGB", version, number of graphics (2 bytes)
+
+class BitGraphicBundle:
+    """
+    A bundle file: many BitGraphics (each in the binary format) stored one after another behind an index of their names, sizes and positions, so that each can be read on its own when it is first needed.
+    Bundles are created on the desktop with compile_bundle. Only the index is read when opening one.
+    """
+
+    def __init__(self, path:str) -> None:
+        self.path:str = path
+        self._index:dict[str, tuple[int, int, int, int]] = {} # name -> (width, height, offset, length)
+
+        # read the index
+        f = open(path, "rb")
+        header:bytes = f.read(BUNDLE_HEADER_SIZE)
+        if len(header) < BUNDLE_HEADER_SIZE or header[0:3] != b"BGB":
+            f.close()
+            raise Exception("'" + path + "' is not a BitGraphic bundle (missing 'BGB' header).")
+        if header[3] != BUNDLE_VERSION:
+            f.close()
+            raise Exception("BitGraphic bundle format version " + str(header[3]) + " is not supported.")
+        count:int = header[4] | (header[5] << 8)
+        for i in range(0, count):
+            name:str = f.read(f.read(1)[0]).decode("utf-8")
+            entry:bytes = f.read(12) # width (2 bytes), height (2 bytes), offset (4 bytes), length (4 bytes)
+            self._index[name] = (int.from_bytes(entry[0:2], "little"), int.from_bytes(entry[2:4], "little"), int.from_bytes(entry[4:8], "little"), int.from_bytes(entry[8:12], "little"))
+        f.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name:str) -> bool:
+        return name in self._index
+
+    def names(self) -> list[str]:
+        """Returns the name of every graphic in the bundle"""
+        return list(self._index.keys())
+
+    def size(self, name:str) -> tuple[int, int]:
+        """Returns the (width, height) of a graphic without reading it"""
+        entry = self._entry(name)
+        return (entry[0], entry[1])
+
+    def load(self, name:str) -> BitGraphic:
+        """Reads and decodes a single graphic from the bundle"""
+        entry = self._entry(name)
+        f = open(self.path, "rb")
+        f.seek(entry[2])
+        data:bytes = f.read(entry[3])
+        f.close()
+        ToReturn:BitGraphic = BitGraphic()
+        ToReturn.from_bytes(data)
+        return ToReturn
+
+    def _entry(self, name:str) -> tuple[int, int, int, int]:
+        entry = self._index.get(name)
+        if entry == None:
+            raise Exception("BitGraphic '" + name + "' is not in bundle '" + self.path + "'.")
+        return entry
+
+
+def _exists(path:str) -> bool:
+    """Whether a file can be opened for reading"""
+    try:
+        open(path, "rb").close()
+        return True
+    except OSError:
+        return False
+
+def _graphic_size(bg:"BitGraphic|SparseBitGraphic") -> int:
+    """Approximate bytes of memory a loaded graphic takes up"""
+    if isinstance(bg, SparseBitGraphic):
+        return (bg.spans * 8) + (bg.height * 4) # two ints per span, and a list entry per row
+    return len(bg.buf)
+
+class AssetManager:
+    """
+    Loads graphics by name from a folder (i.e. graphics/) and keeps the most recently used ones in memory, up to a budget of bytes.
+    A name is a path below the folder without an extension: "brands/64x64/apple" is read from brands/64x64/apple.bg, apple.json, or from the bundle brands/64x64.bgb, whichever is found first.
+    Pinned graphics are never evicted. They count against the budget, leaving less of it for the rest.
+    """
+
+    def __init__(self, root:str = "graphics", budget:int = 8192) -> None:
+        self.root:str = root.rstrip("/")
+        self.budget:int = budget
+        self.cache:_LRUCache = _LRUCache(budget)
+        self._pinned:dict = {} # name -> (graphic, size)
+        self._pinned_bytes:int = 0
+        self._sources:dict = {} # name -> path of the file, or (bundle, name within it)
+        self._bundles:dict = {} # path -> BitGraphicBundle (None if there is no bundle at that path)
+
+    def get(self, name:str) -> "BitGraphic|SparseBitGraphic":
+        """Returns the graphic with this name, from memory if it is there, otherwise from flash (keeping it in memory if it fits). Treat it as read-only, it is shared."""
+        pinned = self._pinned.get(name)
+        if pinned != None:
+            self.cache.hits = self.cache.hits + 1
+            return pinned[0]
+        ToReturn = self.cache.get(name)
+        if ToReturn == None:
+            ToReturn = self._load(name)
+            self.cache.put(name, ToReturn, _graphic_size(ToReturn))
+        return ToReturn
+
+    def pin(self, name:str) -> None:
+        """Loads a graphic (if needed) and keeps it in memory until unpin"""
+        if name in self._pinned:
+            return
+        bg = self.get(name)
+        size:int = _graphic_size(bg)
+        if self._pinned_bytes + size > self.budget:
+            raise Exception("Pinning '" + name + "' (" + str(size) + " bytes) would exceed the asset budget of " + str(self.budget) + " bytes.")
+        self.cache.remove(name)
+        self._pinned[name] = (bg, size)
+        self._pinned_bytes = self._pinned_bytes + size
+        self._resize()
+
+    def unpin(self, name:str) -> None:
+        """Lets a pinned graphic be evicted again like any other"""
+        pinned = self._pinned.pop(name, None)
+        if pinned == None:
+            return
+        self._pinned_bytes = self._pinned_bytes - pinned[1]
+        self._resize()
+        self.cache.put(name, pinned[0], pinned[1])
+
+    def prefetch(self, names:list[str]) -> None:
+        """Loads graphics into memory ahead of time (i.e. the icons of the next screen), so that getting them later is a hit. Only as many as fit in the budget stay."""
+        for name in names:
+            if name not in self._pinned and name not in self.cache:
+                bg = self._load(name)
+                self.cache.put(name, bg, _graphic_size(bg))
+
+    def clear(self) -> None:
+        """Drops every graphic that is not pinned from memory"""
+        self.cache.clear()
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses
+
+    @property
+    def evictions(self) -> int:
+        return self.cache.evictions
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache.hit_rate
+
+    @property
+    def resident(self) -> int:
+        """Bytes of graphics held in memory, pinned or not"""
+        return self.cache.resident + self._pinned_bytes
+
+    def stats(self) -> dict:
+        """Returns the cache counters as a JSON-serializable dict"""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate, "resident": self.resident, "pinned": len(self._pinned), "cached": len(self.cache), "budget": self.budget}
+
+    def _resize(self) -> None:
+        """Shrinks (or grows) the budget of the unpinned graphics to what the pinned ones leave, evicting the least recently used ones that no longer fit"""
+        self.cache.budget = self.budget - self._pinned_bytes
+        while self.cache.resident > self.cache.budget:
+            self.cache.evictions = self.cache.evictions + 1
+            self.cache.remove(self.cache._order[0])
 
-    def image_to_BitGraphic(img_path:str, threshold:float = 0.5, resize:tuple[int, int] = None) -> BitGraphic:
+    def _load(self, name:str) -> "BitGraphic|SparseBitGraphic":
+        source = self._sources.get(name)
+        if source == None:
+            source = self._resolve(name)
+            self._sources[name] = source
+        if type(source) == str:
+            ToReturn = load(source)
+            if isinstance(ToReturn, SparseBitGraphic) and _graphic_size(ToReturn) > ((ToReturn.width + 7) >> 3) * ToReturn.height: # smaller on flash, but not in memory
+                ToReturn = ToReturn.to_BitGraphic()
+            return ToReturn
+        return source[0].load(source[1])
+
+    def _resolve(self, name:str):
+        """Finds where a graphic is stored"""
+        path:str = self.root + "/" + name
+        for extension in (BINARY_EXTENSION, ".json"):
+            if _exists(path + extension):
+                return path + extension
+        if _exists(path): # the name included its extension
+            return path
+        split:int = path.rfind("/")
+        if split > len(self.root):
+            bundle_path:str = path[0:split] + BUNDLE_EXTENSION
+            if bundle_path not in self._bundles:
+                self._bundles[bundle_path] = BitGraphicBundle(bundle_path) if _exists(bundle_path) else None
+            bundle:BitGraphicBundle = self._bundles[bundle_path]
+            if bundle != None and path[split + 1:] in bundle:
+                return (bundle, path[split + 1:])
+        raise Exception("Graphic '" + name + "' was not found in '" + self.root + "'.")
+
+
+# animation: a keyframe followed by the changes (deltas) needed to get to each following frame
+ANIMATION_EXTENSION:str = ".bga"
+ANIMATION_VERSION:int = 0
+ANIMATION_HEADER_SIZE:int = 12 # "BGA", version, width (2 bytes), height (2 bytes), number of frames (2 bytes), milliseconds per frame (2 bytes)
+_FRAME_KEY:int = 0 # record type: the packed rows of the whole frame
+_FRAME_DELTA:int = 1 # record type: a number of rectangles (2 bytes), each x, y, width, height (2 bytes each) followed by its rows XOR'ed with the previous frame's
+
+class BitGraphicAnimation:
+    """
+    An animation file (see save), played one frame at a time straight from flash. Only the current frame is held in memory, no matter how many frames there are.
+    Each frame is stored as the rectangles that changed since the previous one (XOR'ed with it), so next_frame() also reports which parts of the frame need redrawing.
+    """
+
+    def __init__(self, path:str) -> None:
+        self.path:str = path
+        self._f = open(path, "rb")
+        header:bytes = self._f.read(ANIMATION_HEADER_SIZE)
+        if len(header) < ANIMATION_HEADER_SIZE or header[0:3] != b"BGA":
+            self._f.close()
+            raise Exception("'" + path + "' is not a BitGraphic animation (missing 'BGA' header).")
+        if header[3] != ANIMATION_VERSION:
+            self._f.close()
+            raise Exception("BitGraphic animation format version " + str(header[3]) + " is not supported.")
+        self.width:int = header[4] | (header[5] << 8)
+        self.height:int = header[6] | (header[7] << 8)
+        self.frame_count:int = header[8] | (header[9] << 8)
+        self.frame_ms:int = header[10] | (header[11] << 8)
+        self.frame:BitGraphic = BitGraphic() # the current frame, updated in place by next_frame
+        self.frame.from_blank(self.width, self.height)
+        self.index:int = -1 # the frame currently in self.frame (-1 before the first call to next_frame)
+        self._row:bytearray = bytearray(self.frame.stride) # one row of a delta, as it is read
+        self._loop_offset:int = 0 # where frame 1 starts, found while reading frame 0
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def next_frame(self) -> list[tuple[int, int, int, int]]:
+        """Advances self.frame to the next frame (after the last one comes the first) and returns the (x, y, width, height) rectangles of it that changed"""
+        if self.index == -1 or self.frame_count == 1:
+            self._f.seek(ANIMATION_HEADER_SIZE)
+        ToReturn = self._read_record()
+        self.index = self.index + 1
+        if self.index == 0:
+            self._loop_offset = self._f.tell()
+        elif self.index == self.frame_count: # that was the delta from the last frame back to the first
+            self.index = 0
+            self._f.seek(self._loop_offset)
+        return ToReturn
+
+    def rewind(self) -> None:
+        """Starts again from the first frame on the next call to next_frame"""
+        self.index = -1
+
+    def close(self) -> None:
+        self._f.close()
+
+    def _read_record(self) -> list[tuple[int, int, int, int]]:
+        """Reads one frame record into self.frame"""
+        kind:bytes = self._f.read(1)
+        if len(kind) == 0:
+            raise Exception("BitGraphic animation '" + self.path + "' is truncated.")
+        if kind[0] == _FRAME_KEY:
+            self._f.readinto(self.frame.buf)
+            return [(0, 0, self.width, self.height)]
+        if kind[0] != _FRAME_DELTA:
+            raise Exception("Unknown frame type " + str(kind[0]) + " in BitGraphic animation '" + self.path + "'.")
+        ToReturn:list[tuple[int, int, int, int]] = []
+        buf:bytearray = self.frame.buf
+        stride:int = self.frame.stride
+        count:bytes = self._f.read(2)
+        for i in range(0, count[0] | (count[1] << 8)):
+            rect:bytes = self._f.read(8)
+            x:int = rect[0] | (rect[1] << 8)
+            y:int = rect[2] | (rect[3] << 8)
+            w:int = rect[4] | (rect[5] << 8)
+            h:int = rect[6] | (rect[7] << 8)
+            nbytes:int = (w + 7) >> 3 # rectangles always start on a byte, so each of their rows is whole bytes of the frame's row
+            row = memoryview(self._row)[0:nbytes]
+            for ry in range(y, y + h):
+                self._f.readinto(row)
+                offset:int = (ry * stride) + (x >> 3)
+                buf[offset:offset + nbytes] = (int.from_bytes(buf[offset:offset + nbytes], "big") ^ int.from_bytes(row, "big")).to_bytes(nbytes, "big")
+            ToReturn.append((x, y, w, h))
+        return ToReturn
+
+    @staticmethod
+    def save(path:str, frames, frame_ms:int = 100) -> None:
         """
-        Converts a bitmap image (JPG, PNG, etc.) to a BitGraphic.
-        
-        Parameters
-        ----------
-        img_path:str
-            The path to the image file.
-        threshold:float, optional
-            Defines how "dark" each RGB pixel has to be for it to be considered "filled in". Higher threshold values are more discriminating.
-
-        Returns
-        -------
-        tuple
-            A tuple containing:
-            - bytes: The image data in bytes that can be loaded into a FrameBuffer in MicroPython.
-            - int: The width of the image.
-            - int: The height of the image.
+        Writes an animation file from BitGraphics of the same size (a list, or any iterable such as frames_from_sheet, so the frames do not all have to be in memory at once).
+        The first frame is stored whole. Every other frame (and the step from the last frame back to the first, for looping) is stored as the rectangles of rows that changed, unless storing it whole is smaller.
         """
-        
-        # create what we will return
-        ToReturn:BitGraphic = BitGraphic()
+        f = open(path, "wb")
+        f.write(bytes(ANIMATION_HEADER_SIZE)) # written properly once the frames are counted
+        first:BitGraphic = None
+        previous:BitGraphic = None
+        count:int = 0
+        for frame in frames:
+            if not frame._compact(): # a view (see BitGraphic.crop)
+                frame = frame.copy()
+            if first == None:
+                first = frame
+                f.write(bytes([_FRAME_KEY]))
+                f.write(frame.buf)
+            else:
+                if frame.width != first.width or frame.height != first.height:
+                    f.close()
+                    raise Exception("Every frame of an animation must be " + str(first.width) + "x" + str(first.height) + ", but frame " + str(count) + " is " + str(frame.width) + "x" + str(frame.height) + ".")
+                f.write(BitGraphicAnimation._delta(previous, frame))
+            previous = frame
+            count = count + 1
+        if first == None:
+            f.close()
+            raise Exception("An animation needs at least one frame.")
+        if count > 1:
+            f.write(BitGraphicAnimation._delta(previous, first))
+        f.seek(0)
+        f.write(b"BGA" + bytes([ANIMATION_VERSION, first.width & 0xFF, first.width >> 8, first.height & 0xFF, first.height >> 8, count & 0xFF, count >> 8, frame_ms & 0xFF, frame_ms >> 8]))
+        f.close()
 
-        # open image
-        i = PIL.Image.open(img_path)
+    @staticmethod
+    def _delta(previous:BitGraphic, frame:BitGraphic) -> bytes:
+        """Encodes the record that turns previous into frame: each run of consecutive changed rows becomes one rectangle, as wide as the bytes that changed in it"""
+        stride:int = frame.stride
+        rects:list[bytes] = []
+        y:int = 0
+        while y < frame.height:
+
+            # find the next run of changed rows and the range of bytes that changed in it
+            diffs:list[int] = []
+            left:int = stride
+            right:int = -1
+            while y < frame.height:
+                offset:int = y * stride
+                diff:int = int.from_bytes(previous.buf[offset:offset + stride], "big") ^ int.from_bytes(frame.buf[offset:offset + stride], "big")
+                if diff == 0:
+                    break
+                changed:bytes = diff.to_bytes(stride, "big") # found a byte at a time, as MicroPython has no int.bit_length
+                first:int = 0
+                while changed[first] == 0:
+                    first = first + 1
+                last:int = stride - 1
+                while changed[last] == 0:
+                    last = last - 1
+                left = min(left, first)
+                right = max(right, last)
+                diffs.append(diff)
+                y = y + 1
+            if len(diffs) == 0:
+                y = y + 1
+                continue
+
+            # encode it
+            x:int = left * 8
+            w:int = min((right + 1) * 8, frame.width) - x
+            top:int = y - len(diffs)
+            rect:bytearray = bytearray([x & 0xFF, x >> 8, top & 0xFF, top >> 8, w & 0xFF, w >> 8, len(diffs) & 0xFF, len(diffs) >> 8])
+            for diff in diffs:
+                rect.extend((diff >> ((stride - 1 - right) * 8)).to_bytes(right + 1, "big")[left:])
+            rects.append(bytes(rect))
+
+        ToReturn:bytes = bytes([_FRAME_DELTA, len(rects) & 0xFF, len(rects) >> 8]) + b"".join(rects)
+        if len(ToReturn) >= 1 + len(frame.buf): # changed too much, storing the whole frame is smaller
+            return bytes([_FRAME_KEY]) + bytes(frame.buf)
+        return ToReturn
+
+    @staticmethod
+    def frames_from_sheet(sheet:BitGraphic, frame_width:int, frame_height:int, count:int = None):
+        """Yields the frames of a sprite sheet (frames laid out left to right, then top to bottom), one at a time. count limits the number of frames, for sheets whose last row is not full."""
+        columns:int = sheet.width // frame_width
+        rows:int = sheet.height // frame_height
+        if count == None:
+            count = columns * rows
+        for i in range(0, min(count, columns * rows)):
+            frame:BitGraphic = BitGraphic()
+            frame.from_blank(frame_width, frame_height)
+            frame.blit(sheet, -(i % columns) * frame_width, -(i // columns) * frame_height, BLEND_OVERWRITE)
+            yield frame
+
+
+class FrameScheduler:
+    """
+    Paces sending frames to a display from an asyncio (or uasyncio) task, so that drawing code never waits on the bus.
+    Draw into the display as usual (the back buffer), then call commit() once the frame is complete to hand a snapshot of it to the scheduler. The scheduler's task sends the latest committed frame at most fps times per second, one changed page at a time, letting other tasks run between pages. If frames are committed faster than the bus can send them, the ones that were never sent are dropped in favor of the newest.
+    """
+
+    def __init__(self, display, fps:float = 30) -> None:
+        self.display = display if hasattr(display, "oled") else None # a BitGraphicDisplay, whose stats and on_frame get every frame sent
+        self.oled = display.oled if hasattr(display, "oled") else display # a BitGraphicDisplay or an SSD1306 driver
+        self.fps:float = fps
+        self._front:bytearray = bytearray(len(self.oled.buffer)) # the committed frame, waiting to be sent
+        self._sending:bytearray = bytearray(len(self.oled.buffer)) # the frame being sent, swapped with _front so commits can carry on meanwhile
+        self._pending:bool = False
+        self._running:bool = False
+        self._event = _asyncio().Event()
+
+        # stats
+        self.frames_committed:int = 0
+        self.frames_sent:int = 0
+        self.frames_dropped:int = 0 # committed, but replaced by a newer frame before being sent
+        self.last_frame_ms:float = 0.0 # how long sending the last frame kept the bus busy (not counting the other tasks that ran in between)
+        self.total_frame_ms:float = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of committed frames waiting to be sent (0 or 1, as newer frames replace older ones)"""
+        return 1 if self._pending else 0
+
+    @property
+    def average_frame_ms(self) -> float:
+        """Average time sending a frame kept the bus busy"""
+        if self.frames_sent == 0:
+            return 0.0
+        return self.total_frame_ms / self.frames_sent
+
+    def commit(self) -> None:
+        """Takes a snapshot of what has been drawn as the next frame to send"""
+        if self._pending:
+            self.frames_dropped = self.frames_dropped + 1
+        self._front[:] = self.oled.buffer
+        self._pending = True
+        self.frames_committed = self.frames_committed + 1
+        self._event.set()
+
+    async def run(self) -> None:
+        """Sends committed frames until stop() is called"""
+        asyncio = _asyncio()
+        self._running = True
+        while self._running:
+            await self._event.wait()
+            self._event.clear()
+            if not self._running:
+                break
+            if not self._pending:
+                continue
+
+            # send the latest frame a window (at most a page) at a time. Frames committed meanwhile go to the other buffer, so the one being sent never changes.
+            started:int = ticks_us()
+            self._front, self._sending = self._sending, self._front
+            self._pending = False
+            busy_us:int = 0
+            windows = self.oled.show_windows(False, self._sending, True)
+            while True:
+                start:int = ticks_us()
+                try:
+                    next(windows)
+                except StopIteration:
+                    break
+                finally:
+                    busy_us = busy_us + ticks_diff(ticks_us(), start)
+                await asyncio.sleep(0.0001) # a timer rather than sleep(0): CPython's asyncio resumes a sleep(0) before timers that came due meanwhile, making other tasks wait for two windows
+            elapsed_ms:float = busy_us / 1000
+            self.frames_sent = self.frames_sent + 1
+            self.last_frame_ms = elapsed_ms
+            self.total_frame_ms = self.total_frame_ms + elapsed_ms
+            if self.display != None:
+                self.display._frame_sent(busy_us)
+
+            # wait out the rest of the frame period, letting other tasks run
+            remaining_ms:float = (1000 / self.fps) - (ticks_diff(ticks_us(), started) / 1000)
+            await asyncio.sleep(remaining_ms / 1000 if remaining_ms > 0 else 0)
+
+    def start(self):
+        """Starts run() as an asyncio task and returns the task"""
+        return _asyncio().create_task(self.run())
+
+    def stop(self) -> None:
+        """Stops run() (after the frame being sent, if any)"""
+        self._running = False
+        self._event.set()
 
-        # resize if desired
-        if resize != None:
-            i = i.resize(resize)
 
-        # record size
-        width, height = i.size
-        ToReturn.width = width
-        ToReturn.height = height
 
-        # calculate the threshold. In other words, the average RGB value that the pixel has to be below (filled in with darkness) to be considered "on" and above to be considered "off"
-        thresholdRGB:int = 255 - int(round(threshold * 255, 0))
+class DisplayStats:
+    """Counters and timings collected by a BitGraphicDisplay, for profiling the rendering path and regression-testing its throughput"""
+
+    def __init__(self, oled:ssd1306.SSD1306) -> None:
+        self._oled = oled
+        self.reset()
+
+    def reset(self) -> None:
+        """Sets every counter back to zero"""
+        self.pixels_written:int = 0 # pixels drawn by display(), after clipping to the screen
+        self.blits:int = 0
+        self.frames:int = 0 # calls to show()
+        self.calls:dict[str, list[int]] = {} # method name -> [calls, total microseconds, longest call in microseconds]
+        self._bus_bytes_start:int = self._oled.bus_bytes
+        self._transactions_start:int = self._oled.transactions
+
+    @property
+    def bus_bytes(self) -> int:
+        """Bytes written to the bus (commands and data, including I2C control bytes)"""
+        return self._oled.bus_bytes - self._bus_bytes_start
+
+    @property
+    def bus_transactions(self) -> int:
+        """Separate writes to the bus"""
+        return self._oled.transactions - self._transactions_start
+
+    def _record(self, name:str, start:int) -> None:
+        """Adds the time since start (from ticks_us) to a method's timings"""
+        self._add(name, ticks_diff(ticks_us(), start))
+
+    def _add(self, name:str, elapsed:int) -> None:
+        """Adds a call that took elapsed microseconds to a method's timings"""
+        timing = self.calls.get(name)
+        if timing == None:
+            self.calls[name] = [1, elapsed, elapsed]
+            return
+        timing[0] = timing[0] + 1
+        timing[1] = timing[1] + elapsed
+        if elapsed > timing[2]:
+            timing[2] = elapsed
+
+    def as_dict(self) -> dict:
+        """Returns every counter and timing as a JSON-serializable dict"""
+        calls:dict = {}
+        for name in self.calls:
+            timing = self.calls[name]
+            calls[name] = {"calls": timing[0], "total_us": timing[1], "max_us": timing[2]}
+        return {"pixels_written": self.pixels_written, "blits": self.blits, "frames": self.frames, "bus_bytes": self.bus_bytes, "bus_transactions": self.bus_transactions, "calls": calls}
+
+
+
+def _position(bg:"BitGraphic|SparseBitGraphic", x:int, y:int, center:tuple[int|float, int|float], width:int, height:int) -> tuple[int, int]:
+    """Works out the top-left corner to draw a graphic at on a width x height screen, from BitGraphicDisplay.display's x, y and center arguments"""
+
+    # if  they did not specify either x,y or center, throw error
+    if (x == None or y == None) and center == None:
+        #raise Exception("You must specify either a fixed (x,y) point or a relative center point when displaying a BitGraphic! You specified neither.")
+        x = 0 # default to 0
+        y = 0 # default to 0
+
+    # if center was not null, calculate x and y automatically, centering on that point
+    if center != None:
+
+        # firstly, if center was provided as a float (between 0 and 1), they are specifying it as a percentage of the width and height. If it was an int, it is absolute
+        if isinstance(center[0], float):
+            nc0 = int(round(center[0] * width, 0))
+            center = (nc0, center[1])
+        if isinstance(center[1], float):
+            nc1 = int(round(center[1] * height, 0))
+            center = (center[0], nc1)
+
+        # calculate center point
+        x = center[0] - int(round(bg.width / 2, 0))
+        y = center[1] - int(round(bg.height / 2, 0))
+
+    return (x, y)
+
+
+class BitGraphicDisplay:
+
+    def __init__(self, i2c:"machine.I2C", width:int, height:int, oled:ssd1306.SSD1306 = None) -> None:
+        """Drives an SSD1306 over I2C. To use any other driver (i.e. ssd1306.SSD1306_SPI), create it yourself and pass it as oled, in which case i2c is not used."""
+        self._width = width
+        self._height = height
+        if oled != None:
+            self.oled = oled
+        else:
+            self.oled = ssd1306.SSD1306_I2C(width, height, i2c)
+        self.stats:DisplayStats = DisplayStats(self.oled)
+        self.on_frame = None # optional function, called with stats after every show()
+
+    @staticmethod
+    def headless(width:int = 128, height:int = 64, latency_ms:float = 0.0, bytes_per_second:int = None, record:bool = False) -> "BitGraphicDisplay":
+        """Creates a BitGraphicDisplay that draws and sends frames exactly like it would on hardware, but over a stand-in I2C bus (fakebus.FakeI2C). Use it to profile or test rendering on a desktop. With record=True, every write is kept in oled.i2c.log."""
+        import fakebus
+        return BitGraphicDisplay(fakebus.FakeI2C(latency_ms, bytes_per_second, record), width, height)
+
+    def clear(self) -> None:
+        start:int = ticks_us()
+        self.oled.fill(0)
+        self.stats._record("clear", start)
+
+    def show(self, full:bool = False) -> None:
+        """Sends what has been drawn to the display. Only the parts that changed since the last show() are sent, unless full is True."""
+        start:int = ticks_us()
+        self.oled.show(full)
+        self._frame_sent(ticks_diff(ticks_us(), start))
+
+    def _frame_sent(self, elapsed:int) -> None:
+        """Records a frame that took elapsed microseconds to send (by show(), or by a FrameScheduler) and calls on_frame"""
+        self.stats.frames = self.stats.frames + 1
+        self.stats._add("show", elapsed)
+        if self.on_frame != None:
+            self.on_frame(self.stats)
+
+    def display(self, bg:"BitGraphic|SparseBitGraphic", x:int=None, y:int=None, center:tuple[int|float, int|float] = None, transparent:bool = False) -> None:
+        """Draws a BitGraphic (or SparseBitGraphic) at (x, y), or centered on a point. With transparent=True, only the graphic's "on" pixels are drawn, leaving whatever is below its "off" pixels as it is."""
+        start:int = ticks_us()
+
+        x, y = _position(bg, x, y, center, self._width, self._height)
+
+        # display BitGraphic in a single blit (which clips anything off screen). A SparseBitGraphic is drawn span by span instead, skipping the empty space.
+        if isinstance(bg, SparseBitGraphic):
+            if not transparent:
+                self.oled.fill_rect(x, y, bg.width, bg.height, 0)
+            for row in range(max(0, -y), min(bg.height, self._height - y)):
+                spans = bg.rows[row]
+                for i in range(0, len(spans), 2):
+                    self.oled.hline(x + spans[i], y + row, spans[i + 1], 1)
+        else:
+            self.oled.blit(bg.to_framebuffer(), x, y, 0 if transparent else -1)
+
+        # record
+        self.stats.blits = self.stats.blits + 1
+        self.stats.pixels_written = self.stats.pixels_written + (max(0, min(x + bg.width, self._width) - max(x, 0)) * max(0, min(y + bg.height, self._height) - max(y, 0)))
+        self.stats._record("display", start)
+    
+class AnimationPlayer:
+    """Plays a BitGraphicAnimation on a BitGraphicDisplay, redrawing (and so sending) only the rectangles that change from one frame to the next"""
+
+    def __init__(self, display:BitGraphicDisplay, animation:BitGraphicAnimation, x:int = 0, y:int = 0, loop:bool = True) -> None:
+        self.display:BitGraphicDisplay = display
+        self.animation:BitGraphicAnimation = animation
+        self.x:int = x
+        self.y:int = y
+        self.loop:bool = loop
+        self._patch:BitGraphic = BitGraphic() # reused for each changed rectangle
+
+    def step(self, show:bool = True) -> bool:
+        """Draws the next frame (only the parts of it that changed) and, if show is True, sends it. Returns False instead once the animation has finished (when not looping)."""
+        if not self.loop and self.animation.index == self.animation.frame_count - 1:
+            return False
+        frame:BitGraphic = self.animation.frame
+        for x, y, w, h in self.animation.next_frame():
+            if x == 0 and y == 0 and w == frame.width and h == frame.height:
+                self.display.display(frame, self.x, self.y)
+                continue
+            if self._patch.width != w or self._patch.height != h:
+                self._patch.from_blank(w, h)
+            self._patch.blit(frame, -x, -y, BLEND_OVERWRITE)
+            self.display.display(self._patch, self.x + x, self.y + y)
+        if show:
+            self.display.show()
+        return True
+
+    async def play(self) -> None:
+        """Steps through the animation at its frame rate (forever, if looping), letting other asyncio tasks run in between frames"""
+        asyncio = _asyncio()
+        while True:
+            start:int = ticks_us()
+            if not self.step():
+                return
+            remaining_ms:float = self.animation.frame_ms - (ticks_diff(ticks_us(), start) / 1000)
+            await asyncio.sleep(remaining_ms / 1000 if remaining_ms > 0 else 0)
+
+class Marquee:
+    """
+    Scrolls a BitGraphic (i.e. a line of Typewriter text) across the full width of a BitGraphicDisplay, in a band starting at row y, looping forever.
+    If the graphic fits on the display and the band lines up with the display's 8-row pages, the display scrolls by itself (hardware scroll): nothing is drawn or sent after start(), and step() does nothing.
+    Otherwise, the graphic is pre-rendered once into a strip followed by a display-wide gap, and each step() draws the visible part of the strip one step further along (software scroll).
+    Anything else drawn in the pages of a hardware-scrolled band scrolls with it. Calling show() stops a hardware scroll; the next step() starts it again from the beginning.
+    """
+
+    def __init__(self, display:BitGraphicDisplay, bg:BitGraphic, y:int, left:bool = True, step:int = 1, interval:int = 5, hardware:bool = True) -> None:
+        self.display:BitGraphicDisplay = display
+        self.bg:BitGraphic = bg
+        self.y:int = y
+        self.left:bool = left
+        self.step_size:int = step # pixels per step() when scrolling in software
+        self.interval:int = interval # display frames per 1 pixel step when scrolling in hardware (see ssd1306.SCROLL_INTERVALS)
+        self.hardware:bool = hardware and self._fits()
+        self.offset:int = 0 # how far along the strip the display is, when scrolling in software
+        self._strip:BitGraphic = None
+
+    def _fits(self) -> bool:
+        """Whether the display can scroll the graphic by itself: as wide as the display at most, on whole pages of the display's RAM (128 columns wide)"""
+        oled = self.display.oled
+        return hasattr(oled, "scroll_horizontal") and oled.width == 128 and self.bg.width <= oled.width and self.y % 8 == 0 and self.y + self.bg.height <= oled.height
+
+    def start(self) -> None:
+        """Draws the graphic and starts scrolling it"""
+        if self.hardware:
+            oled = self.display.oled
+            oled.fill_rect(0, self.y, oled.width, ((self.bg.height + 7) // 8) * 8, 0)
+            self.display.display(self.bg, 0 if self.left else oled.width - self.bg.width, self.y)
+            self.display.show()
+            oled.scroll_horizontal(self.left, self.y // 8, (self.y + self.bg.height - 1) // 8, self.interval)
+            oled.scroll_start()
+            return
+
+        # pre-render the strip: the graphic followed by a gap as wide as the display, so it scrolls fully off before coming round again
+        self._strip = BitGraphic()
+        self._strip.from_blank(self.bg.width + self.display._width, self.bg.height)
+        self._strip.blit(self.bg, 0, 0, BLEND_OVERWRITE)
+        self.offset = 0 if self.left else self._strip.width - self.display._width
+        self._draw()
+        self.display.show()
+
+    def step(self, show:bool = True) -> None:
+        """Moves a software scroll along by one step (and, if show is True, sends it). Restarts a hardware scroll that was stopped."""
+        if self.hardware:
+            if not self.display.oled.scrolling:
+                self.start()
+            return
+        if self._strip == None:
+            self.start()
+            return
+        if self.left:
+            self.offset = (self.offset + self.step_size) % self._strip.width
+        else:
+            self.offset = (self.offset - self.step_size) % self._strip.width
+        self._draw()
+        if show:
+            self.display.show()
+
+    def stop(self) -> None:
+        """Stops a hardware scroll (the band is left wherever it had scrolled to, until the next show())"""
+        if self.hardware:
+            self.display.oled.scroll_stop()
+
+    async def play(self, step_ms:int = 30) -> None:
+        """Steps a software scroll every step_ms milliseconds, letting other asyncio tasks run in between (a hardware scroll just runs)"""
+        asyncio = _asyncio()
+        self.start()
+        while True:
+            await asyncio.sleep(step_ms / 1000)
+            self.step()
+
+    def _draw(self) -> None:
+        """Draws the part of the strip at offset across the display, wrapping around to its start"""
+        self.display.display(self._strip, -self.offset, self.y)
+        if self._strip.width - self.offset < self.display._width:
+            self.display.display(self._strip, self._strip.width - self.offset, self.y)
+
+class TiledCanvas:
+    """
+    One large drawing surface made of several displays (BitGraphicDisplays, each with its own size, I2C address, bus or SPI driver), each showing its own region of the canvas.
+    Anything drawn with display() lands on every panel it overlaps. show() only sends to the panels that were drawn on since the last show(), and panels on different buses are sent to at the same time (on separate threads, where _thread is available).
+    """
+
+    def __init__(self) -> None:
+        self.panels:list[list] = [] # [BitGraphicDisplay, x, y, dirty] of each panel, where (x, y) is the panel's top-left corner on the canvas
+        self.width:int = 0
+        self.height:int = 0
+        self.last_flushed:int = 0 # panels sent to by the last show()
+
+    def add_panel(self, display:BitGraphicDisplay, x:int, y:int) -> None:
+        """Adds a display showing the region of the canvas with its top-left corner at (x, y)"""
+        self.panels.append([display, x, y, True])
+        self.width = max(self.width, x + display._width)
+        self.height = max(self.height, y + display._height)
+
+    def clear(self) -> None:
+        for panel in self.panels:
+            panel[0].clear()
+            panel[3] = True
+
+    def display(self, bg:"BitGraphic|SparseBitGraphic", x:int = None, y:int = None, center:tuple[int|float, int|float] = None, transparent:bool = False) -> None:
+        """Draws a graphic on the canvas, like BitGraphicDisplay.display (centered relative to the whole canvas), splitting it across the panels it overlaps"""
+        x, y = _position(bg, x, y, center, self.width, self.height)
+        for panel in self.panels:
+            display:BitGraphicDisplay = panel[0]
+            if x < panel[1] + display._width and x + bg.width > panel[1] and y < panel[2] + display._height and y + bg.height > panel[2]:
+                display.display(bg, x - panel[1], y - panel[2], transparent=transparent)
+                panel[3] = True
+
+    def show(self, full:bool = False) -> None:
+        """Sends what has been drawn to the panels that changed (all of them if full is True). Each bus is sent to on its own thread, with the panels sharing a bus sent one after another."""
+
+        # group the panels to send by the bus they are on
+        buses:list[list] = []
+        keys:list = []
+        for panel in self.panels:
+            if not panel[3] and not full:
+                continue
+            oled = panel[0].oled
+            bus = getattr(oled, "i2c", None) or getattr(oled, "spi", None) or oled
+            found:bool = False
+            for i in range(0, len(keys)):
+                if keys[i] is bus:
+                    buses[i].append(panel)
+                    found = True
+                    break
+            if not found:
+                keys.append(bus)
+                buses.append([panel])
+
+        # send each bus (but the first) on a thread of its own, then the first on this thread, then wait for the rest
+        errors:list = []
+        waiting:list = []
+        for i in range(1, len(buses)):
+            lock = self._start(buses[i], full, errors)
+            if lock == None: # no threads (left), send it from here instead
+                self._flush(buses[i], full, errors)
+            else:
+                waiting.append(lock)
+        if len(buses) > 0:
+            self._flush(buses[0], full, errors)
+        for lock in waiting:
+            lock.acquire()
+        if len(errors) > 0:
+            raise errors[0]
+
+        self.last_flushed = 0
+        for panels in buses:
+            self.last_flushed = self.last_flushed + len(panels)
+
+    def _start(self, panels:list[list], full:bool, errors:list):
+        """Starts sending to panels on a new thread. Returns a lock that is released once it is done, or None if a thread could not be started."""
+        try:
+            import _thread
+            lock = _thread.allocate_lock()
+            lock.acquire()
+            _thread.start_new_thread(self._flush, (panels, full, errors, lock))
+            return lock
+        except (ImportError, OSError, RuntimeError): # no threading, or (i.e. on the RP2040) the other core is already busy
+            return None
+
+    def _flush(self, panels:list[list], full:bool, errors:list, lock = None) -> None:
+        try:
+            for panel in panels:
+                panel[0].show(full)
+                panel[3] = False
+        except Exception as e:
+            errors.append(e)
+        finally:
+            if lock != None:
+                lock.release()
+
+# hex-encoded packed rows (ENCODING_HEX) of the built-in 16x16 characters, decoded by Typewriter the first time each is used
+_TYPEWRITER_16X16:dict[str, str] = {
+    "0": "07e00ff01ff83e7c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3e7c1ff80ff007e0",
+    "1": "00f003f007f00ff00f7006700070007000700070007000700070007000700070",
+    "2": "0fe01ff01ff83e783c3c003c007800f801f003e007c00f801f001ffc1ffc1ffc",
+    "3": "07e01ff81ff81c780038003800f801f001f000f8003800381c781ff81ff807e0",
+    "4": "007c00fc01fc03fc07fc07bc0fbc1f3c3e3c7ffe7ffe7ffe7ffe0038003c003c",
+    "5": "1ffc3ffc3ffc3c003c003c003fe03ff01ff80078003c003c00783ff83ff03fe0",
+    "6": "07e00ff01ff81e783c3c3fd83fe03ff03ff83e783c3c3c3c1e781ff80ff007e0",
+    "7": "1ff81ff81ff80078007800f000f000f000e001e001e001e003c003c003c00380",
+    "8": "07e00ff01ff81e781e781e781ff80ff00ff01ff81e781e781e781ff80ff007e0",
+    "9": "07e00ff01ff81e783c3c3c3c1e7c1ffc0ffc07fc1bfc3c3c1e781ff80ff007e0",
+    "a": "03c003c007e007e00ff00ff00ff01e781e781ff83ffc3ffc781e781e781ef00f",
+    "b": "3ff03ff83ffc3c3c3c3c3c3c3ff83ff03ff03ff83c3c3c3c3c3c3ffc3ff83ff0",
+    "c": "07f80ffc1ffe3e1e7c007800780078007800780078007c003e1e1ffe0ffc07f8",
+    "d": "7fc07ff07ff878f8783c783c781e781e781e781e783c783c78f87ff87ff07fc0",
+    "e": "1ff81ff81ff81c001c001c001ff81ff81ff81ff81c001c001c001ff81ff81ff8",
+    "f": "1ff81ff81ff81c001c001c001ff81ff81ff81ff81c001c001c001c001c001c00",
+    "g": "0ff01ffc3ffc7c3c78007800f0fff0fff0fff0ff780f781f7c3e3ffe1ffc0ff0",
+    "h": "381c381c381c381c381c381c3ffc3ffc3ffc3ffc381c381c381c381c381c381c",
+    "i": "03c003c003c003c003c003c003c003c003c003c003c003c003c003c003c003c0",
+    "j": "003c003c003c003c003c003c003c003c003c003c3c3c3c3c3e7c1ff81ff807e0",
+    "k": "383c387838f839f03be03bc03f803f803fc03fe03de03df038f03878387c383c",
+    "l": "3c003c003c003c003c003c003c003c003c003c003c003c003c003ffc3ffc3ffc",
+    "m": "f00ff00ff81ff81ff81ffc3ffc3ffc3ffe7ffe7feff7eff7eff7e7e7e7e7e3c7",
+    "n": "780e7c0e7c0e7e0e7f0e7f0e778e77ce73ee71ee70fe70fe707e703e703e701e",
+    "o": "0ff03ffc7ffe7c3ef00ff00fe007e007e007e007f00ff00f7c3e7ffe3ffc0ff0",
+    "p": "3ff03ff83ffc383c3c3c3c3c3ffc3ff83ff03fe03c003c003c003c003c003c00",
+    "q": "0ff03ffc7ffe7c3ef00ff00fe007e007e007e017f03ff07f7c3e7fff3fff0ff7",
+    "r": "3ff03ff83ffc383c3c3c383c3ffc3ff83ff03fc03bc03de03df03cf83c783c3c",
+    "s": "0ffc1ffc1ffc1c003c003c001fc01ff00ff803f8003c003c00383ff83ff83ff0",
+    "t": "7ffe7ffe7ffe03c003c003c003c003c003c003c003c003c003c003c003c003c0",
+    "u": "781e781e781e781e781e781e781e781e781e781e781e781e3c3c3ffc1ff80ff0",
+    "v": "f00f700e781e781e3c3c3c3c3c3c1e781e780e700ff00ff007e007e007e003c0",
+    "w": "e3c7e7e7e7e7e7e7e7e7eff7eff7eff7fe7ffe7ffe7ffe7ffc3ffc3ffc3ffc3f",
+    "x": "f81f781e7c3e3e7c1ff80ff007e007e007e007e00ff01ff83e7c7c3e781ef81f",
+    "y": "f81f7c3e3e7c1e780ff00ff007e003c003c003c003c003c003c003c003c003c0",
+    "z": "ffffffffffff003f007e00fc01f003e007c00f803f007e00fc00ffffffffffff",
+    " ": "0000000000000000000000000000000000000000000000000000000000000000",
+}
+
+class Typewriter:
+
+    def __init__(self, cache_bytes:int = 2048, scale_missing:bool = False) -> None:
+        """With scale_missing=True, a character that is not available in the size asked for is scaled from the largest size of it that is (i.e. 24x24 from the built-in 16x16), instead of raising an error."""
+        self.characters:list[tuple[str, BitGraphic]] = [] # character, graphic pair (of every character loaded so far)
+        self._glyphs:dict[tuple[str, int, int], BitGraphic] = {} # (lowercase character, width, height) -> graphic
+        self._bundled:dict[tuple[str, int, int], tuple[BitGraphicBundle, str]] = {} # characters available from a bundle but not read yet, (lowercase character, width, height) -> (bundle, name)
+        self.cache:_LRUCache = _LRUCache(cache_bytes) # recently written text, (lowercase text, width, height) -> BitGraphic
+        self._last:dict[tuple[int, int], tuple[str, BitGraphic]] = {} # the most recently written (text, BitGraphic) of each size
+        self.scale_missing:bool = scale_missing
+        self._scaled:list[tuple[str, int, int]] = [] # keys of the glyphs made by scaling another size, never scaled from themselves
+
+    def add_character(self, character:str, bg:BitGraphic) -> None:
         
-        # get a list of individual bits for each pixel (True is filled in, False is not filled in)
-        ToReturn.bits.clear()
-        for y in range(0, height):
-            for x in range(0, width):
-                pix:tuple[int, int, int, int] = i.getpixel((x, y)) #[R,G,B,A]
+        # check if we already have a pair with this character and this size
+        key:tuple[str, int, int] = (character.lower(), bg.width, bg.height)
+        if self._has(key):
+            raise Exception("Typewriter already has BitGraphic of size " + str(bg.width) + "x" + str(bg.height) + " representing the character '" + str(character) + "'.")
                 
-                # determine, is this pixel solid (filled in BLACK) or not (filled in WHITE)?
-                filled:bool = False
-                if len(pix) == 3 or pix[3] > 0: # if there are only three values, it is a JPG, so there is now alpha channel. Evaluate the color. If the alpha channel, it is a PNG. If the alpha is set to 0, that means the pixel is invisible, so don't consider it. Just consider it as not being shown.
-                    avg:int = int(round((pix[0] + pix[1] + pix[2]) / 3, 0))
-                    if avg <= thresholdRGB: # it is dark
-                        filled = True
+        # if we got here, we don't have it exactly! So add it.
+        self.characters.append((character, bg))
+        self._glyphs[key] = bg
 
-                # add it to the list of bits
-                ToReturn.bits.append(filled)
+    def add_bundle(self, bundle:BitGraphicBundle) -> None:
+        """Makes every graphic in a bundle available as a character, named by its name in the bundle (i.e. "a" or "7"). Each is only read from the bundle the first time it is written."""
+        for name in bundle.names():
+            width, height = bundle.size(name)
+            key:tuple[str, int, int] = (name.lower(), width, height)
+            if self._has(key):
+                raise Exception("Typewriter already has BitGraphic of size " + str(width) + "x" + str(height) + " representing the character '" + name + "'.")
+            self._bundled[key] = (bundle, name)
 
-        # return!
-        return ToReturn
+    def _has(self, key:tuple[str, int, int]) -> bool:
+        """Returns True if a character of this size is available, loaded or not"""
+        if key in self._glyphs or key in self._bundled:
+            return True
+        return key[1] == 16 and key[2] == 16 and key[0] in _TYPEWRITER_16X16
+
+    def _glyph(self, character:str, width:int, height:int) -> BitGraphic:
+        """Returns the graphic of a (lowercase) character, loading it on first use, or None if there isn't one"""
+        key:tuple[str, int, int] = (character, width, height)
+        bg:BitGraphic = self._glyphs.get(key)
+        if bg != None:
+            return bg
 
-    def images_to_BitGraphics(original_bitmaps_dir:str, output_dir:str, threshold:float = 0.5, resize:tuple[int, int] = None) -> None:
-        """Converts all bitmap images in a folder to a buffer in another file. Great for converting a group of bitmap images to various sizes, ready for display on SSD-1306."""
+        # load it
+        source = self._bundled.pop(key, None)
+        if source != None:
+            bg = source[0].load(source[1])
+        elif width == 16 and height == 16 and character in _TYPEWRITER_16X16:
+            bg = BitGraphic(jsond={"encoding": ENCODING_HEX, "bits": _TYPEWRITER_16X16[character], "width": 16, "height": 16})
+        elif self.scale_missing:
+
+            # scale the largest original size of this character there is
+            best:tuple[str, int, int] = None
+            candidates:list[tuple[str, int, int]] = list(self._glyphs.keys()) + list(self._bundled.keys())
+            if character in _TYPEWRITER_16X16:
+                candidates.append((character, 16, 16))
+            for candidate in candidates:
+                if candidate[0] == character and candidate not in self._scaled and (best == None or candidate[1] * candidate[2] > best[1] * best[2]):
+                    best = candidate
+            if best == None:
+                return None
+            bg = self._glyph(character, best[1], best[2]).scale(width, height)
+            self._scaled.append(key)
+        else:
+            return None
+        self.characters.append((character, bg))
+        self._glyphs[key] = bg
+        return bg
+
+    def write(self, text:str, width:int, height:int) -> BitGraphic:
+        """Types text into a single BitGraphic. Recently written text is returned from a cache, so treat the returned BitGraphic as read-only (copy it before modifying it)."""
+        text = text.lower()
+
+        # already written recently?
+        key:tuple[str, int, int] = (text, width, height)
+        cached:BitGraphic = self.cache.get(key)
+        if cached != None:
+            return cached
+
+        # every character of a size is the same width, so each one lands at a fixed position. If the last text written at this size was the same length, start from it and only redraw the characters that changed (i.e. the digits of a changing reading).
+        ToReturn:BitGraphic = BitGraphic()
+        previous:str = None
+        last = self._last.get((width, height))
+        if last != None and len(last[0]) == len(text):
+            previous = last[0]
+            ToReturn.from_blank(last[1].width, last[1].height)
+            ToReturn.buf[:] = last[1].buf
+        elif len(text) > 0:
+            ToReturn.from_blank(width * len(text), height)
 
-        for filename in os.listdir(original_bitmaps_dir):
-            fullpath = os.path.join(original_bitmaps_dir, filename)
-            converted = image_to_BitGraphic(fullpath, resize=resize, threshold=threshold)
+        for i in range(0, len(text)):
+            c:str = text[i]
+            if previous != None and previous[i] == c:
+                continue
+
+            # find appropriate one
+            CorrectBG:BitGraphic = self._glyph(c, width, height)
             
-            # trim off the ".png" or ".jpg"
-            fn_only:str = filename[0:-4]
-            result_path = os.path.join(output_dir, fn_only + ".json")
-            f = open(result_path, "w")
-            f.write(converted.to_json())
+            # if there wasn't one that was found, throw an error
+            if CorrectBG == None:
+                
+                # raise an exception if we don't have that character
+                raise Exception("BitGraphic of character '" + str(c) + "' and size '" + str(width) + "x" + str(height) + " was not found in the list of available BitGraphic characters in the Typewriter.")
+                
+                # make a blank one
+                # CorrectBG = BitGraphic()
+                # CorrectBG.from_blank(width, height)
+
+
+            # add it!
+            ToReturn.blit(CorrectBG, i * width, 0, BLEND_OVERWRITE)
+
+        # remember and return
+        self._last[(width, height)] = (text, ToReturn)
+        self.cache.put(key, ToReturn, len(ToReturn.buf))
+        return ToReturn
+
+
 
-            # print
-            print("Finished converting '" + filename + "'!")
+# desktop tools (windows, linux, etc.): image conversion, json_to_binary and compile_bundle live in bitgraphics_desktop.py, which is not copied to the microcontroller. They can still be used through this module.
+if sys.platform != "rp2":
 
+    def __getattr__(name:str):
+        """Looks up names this module doesn't have (i.e. image_to_BitGraphic) in bitgraphics_desktop, the first time they are used"""
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            import bitgraphics_desktop
+        except ImportError: # not copied alongside, i.e. on a microcontroller
+            raise AttributeError("module 'bitgraphics' has no attribute '" + name + "'")
+        if not hasattr(bitgraphics_desktop, name):
+            raise AttributeError("module 'bitgraphics' has no attribute '" + name + "'")
+        return getattr(bitgraphics_desktop, name)
@@ -0,0 +1,369 @@
+"""
+bitgraphics_desktop.py: the desktop (Windows, Linux, Mac) tools for bitgraphics. They convert images to BitGraphics and pack graphics into binary files and bundles, ready to copy to the microcontroller.
+This module is not needed on the microcontroller, so don't copy it there; keeping these tools out of bitgraphics.py saves the RAM it would take to compile them. On the desktop, they can also be used through bitgraphics (i.e. bitgraphics.image_to_BitGraphic), as before.
+Author Tim Hanewich, github.com/TimHanewich
+Find updates to this code: https://github.com/TimHanewich/bitgraphics
+MIT License, see bitgraphics.py
+"""
+
+import json
+import os
+from bitgraphics import BitGraphic, BINARY_EXTENSION, BUNDLE_HEADER_SIZE, BUNDLE_VERSION, _parse_header, ticks_us, ticks_diff
+
+try:
+    import PIL.Image
+except ImportError: # Pillow is only needed to convert images
+    PIL = None
+try:
+    import numpy
+except ImportError: # optional, image_to_BitGraphic is faster with it
+    numpy = None
+
+# dithering modes for image_to_BitGraphic
+DITHER_FLOYD_STEINBERG:str = "floyd-steinberg" # error diffusion, best for photos and gradients
+DITHER_ORDERED:str = "ordered" # 8x8 Bayer pattern, a regular texture that stays stable between similar images (i.e. animation frames)
+
+# threshold for image_to_BitGraphic that picks the best threshold for each image (Otsu's method)
+THRESHOLD_OTSU:str = "otsu"
+
+_BAYER_8X8:list[int] = [0, 32, 8, 40, 2, 34, 10, 42, 48, 16, 56, 24, 50, 18, 58, 26, 12, 44, 4, 36, 14, 46, 6, 38, 60, 28, 52, 20, 62, 30, 54, 22, 3, 35, 11, 43, 1, 33, 9, 41, 51, 19, 59, 27, 49, 17, 57, 25, 15, 47, 7, 39, 13, 45, 5, 37, 63, 31, 55, 23, 61, 29, 53, 21]
+
+def _image_math(expression:str, **images) -> "PIL.Image.Image":
+    """Evaluates a pixel-wise expression over whole images in C (PIL.ImageMath)"""
+    import PIL.ImageMath
+    if hasattr(PIL.ImageMath, "unsafe_eval"): # Pillow 10.3 and later. The expressions are all our own, never user input.
+        return PIL.ImageMath.unsafe_eval(expression, **images)
+    return PIL.ImageMath.eval(expression, **images)
+
+def _otsu_threshold(histogram:list[int]) -> int:
+    """Returns the gray level (0-255) that best separates a 256-bin histogram into dark and light (Otsu's method). Levels at or below it are dark."""
+    total:int = sum(histogram)
+    sum_all:int = 0
+    for level in range(0, 256):
+        sum_all = sum_all + (level * histogram[level])
+    best_level:int = 127
+    best_variance:float = -1.0
+    count_dark:int = 0
+    sum_dark:int = 0
+    for level in range(0, 256):
+        count_dark = count_dark + histogram[level]
+        sum_dark = sum_dark + (level * histogram[level])
+        count_light:int = total - count_dark
+        if count_dark == 0 or count_light == 0:
+            continue
+        difference:float = (sum_dark / count_dark) - ((sum_all - sum_dark) / count_light)
+        variance:float = count_dark * count_light * difference * difference
+        if variance > best_variance:
+            best_variance = variance
+            best_level = level
+    return best_level
+
+def _numpy_to_BitGraphic(i:"PIL.Image.Image", threshold:"float|str", dither:str) -> BitGraphic:
+    """image_to_BitGraphic's conversion of an RGB or RGBA image, on NumPy arrays (same output as the Pillow version)"""
+    pixels = numpy.asarray(i)
+    total = pixels[:, :, 0].astype(numpy.uint16) + pixels[:, :, 1] + pixels[:, :, 2] # 3 times the average RGB value of each pixel
+    if pixels.shape[2] == 4:
+        shown = pixels[:, :, 3] > 0 # fully transparent pixels are never filled in
+    else:
+        shown = numpy.ones(total.shape, dtype=bool)
+    if dither == None:
+        if threshold == THRESHOLD_OTSU:
+            gray = (total + 1) // 3 # round(total / 3), see image_to_BitGraphic
+            thresholdRGB:int = _otsu_threshold(numpy.bincount(gray[shown], minlength=256).tolist())
+        else:
+            thresholdRGB:int = 255 - int(round(threshold * 255, 0))
+        filled = total <= (3 * thresholdRGB) + 1
+    elif dither == DITHER_ORDERED:
+        thresholds = numpy.array([int((level + 0.5) * 4) for level in _BAYER_8X8], dtype=numpy.uint16).reshape(8, 8)
+        height, width = total.shape
+        filled = (total + 1) // 3 < numpy.tile(thresholds, ((height + 7) // 8, (width + 7) // 8))[0:height, 0:width]
+    else:
+        raise Exception("Unknown dither mode '" + str(dither) + "'.")
+    return BitGraphic.from_numpy(numpy.packbits(filled & shown, axis=1), total.shape[1])
+
+def image_to_BitGraphic(img_path:"str|PIL.Image.Image", threshold:"float|str" = 0.5, resize:tuple[int, int] = None, dither:str = None) -> BitGraphic:
+    """
+    Converts a bitmap image (JPG, PNG, etc.) to a BitGraphic.
+    
+    Parameters
+    ----------
+    img_path:str
+        The path to the image file (or an already opened PIL image).
+    threshold:float, optional
+        Defines how "dark" each RGB pixel has to be for it to be considered "filled in". Higher threshold values are more discriminating. Use THRESHOLD_OTSU to pick the threshold that best separates each image's dark and light pixels automatically. Not used when dithering.
+    resize:tuple[int, int], optional
+        The (width, height) to resize the image to before converting it.
+    dither:str, optional
+        DITHER_FLOYD_STEINBERG or DITHER_ORDERED to approximate shades of gray with patterns of filled in pixels, instead of a hard threshold.
+
+    Returns
+    -------
+    BitGraphic
+        The converted graphic. Fully transparent pixels are never filled in.
+    """
+    
+    if PIL == None:
+        raise Exception("Converting images requires Pillow (pip install pillow).")
+
+    # create what we will return
+    ToReturn:BitGraphic = BitGraphic()
+
+    # open image
+    i = img_path
+    if type(img_path) == str:
+        i = PIL.Image.open(img_path)
+
+    # resize if desired
+    if resize != None:
+        i = i.resize(resize)
+
+    # work with RGB (JPG) or RGBA (PNG) pixels
+    if i.mode != "RGB" and i.mode != "RGBA":
+        if "A" in i.mode or "transparency" in i.info:
+            i = i.convert("RGBA")
+        else:
+            i = i.convert("RGB")
+
+    # record size
+    width, height = i.size
+    ToReturn.from_blank(width, height)
+    if width == 0 or height == 0:
+        return ToReturn
+
+    # with NumPy, everything but Floyd-Steinberg dithering (Pillow's own, in C) is done on arrays
+    if numpy != None and dither != DITHER_FLOYD_STEINBERG:
+        return _numpy_to_BitGraphic(i, threshold, dither)
+
+    bands = i.split() # [R,G,B] or [R,G,B,A]
+    r = bands[0]
+    g = bands[1]
+    b = bands[2]
+    a = bands[3] if len(bands) == 4 else PIL.Image.new("L", i.size, 255) # if there is no alpha channel (JPG), every pixel is shown. If the alpha is set to 0, that means the pixel is invisible, so don't consider it. Just consider it as not being shown.
+
+    # the average RGB value of each pixel, as a whole image. (r + g + b + 1) / 3 in integers is the same as round((r + g + b) / 3) because the sum divided by 3 never ends in .5
+    gray = None
+    if dither != None or threshold == THRESHOLD_OTSU:
+        gray = _image_math("(r + g + b + 1) / 3", r=r, g=g, b=b).convert("L")
+
+    # determine, for each pixel at once, is this pixel solid (filled in BLACK) or not (filled in WHITE)? 255 is filled in, 0 is not.
+    if dither == None:
+
+        # calculate the threshold. In other words, the average RGB value that the pixel has to be below (filled in with darkness) to be considered "on" and above to be considered "off"
+        if threshold == THRESHOLD_OTSU:
+            thresholdRGB:int = _otsu_threshold(gray.histogram(_image_math("(a > 0) * 255", a=a).convert("L")))
+        else:
+            thresholdRGB:int = 255 - int(round(threshold * 255, 0))
+
+        # round((r + g + b) / 3) <= thresholdRGB is the same as r + g + b <= (3 * thresholdRGB) + 1
+        filled = _image_math("((r + g + b) <= k) * (a > 0) * 255", r=r, g=g, b=b, a=a, k=(3 * thresholdRGB) + 1)
+    elif dither == DITHER_FLOYD_STEINBERG:
+
+        # Pillow's own error diffusion turns light pixels on, so dither the darkness instead
+        darkness = gray.point([255 - level for level in range(0, 256)])
+        diffused = darkness.convert("1").convert("L")
+        filled = _image_math("(d > 0) * (a > 0) * 255", d=diffused, a=a)
+    elif dither == DITHER_ORDERED:
+
+        # tile the 8x8 threshold map across the image, then compare every pixel against its threshold
+        cell = PIL.Image.new("L", (8, 8))
+        cell.putdata([int((level + 0.5) * 4) for level in _BAYER_8X8])
+        row = PIL.Image.new("L", (width, 8))
+        for x in range(0, width, 8):
+            row.paste(cell, (x, 0))
+        thresholds = PIL.Image.new("L", (width, height))
+        for y in range(0, height, 8):
+            thresholds.paste(row, (0, y))
+        filled = _image_math("(gray < t) * (a > 0) * 255", gray=gray, t=thresholds, a=a)
+    else:
+        raise Exception("Unknown dither mode '" + str(dither) + "'.")
+
+    # pack into bits, MSB first with each row padded to a full byte (the same layout as BitGraphic)
+    packed = filled.convert("L").convert("1", dither=getattr(PIL.Image, "Dither", PIL.Image).NONE)
+
+    # return!
+    return BitGraphic.from_pil(packed)
+
+def images_to_BitGraphics(original_bitmaps_dir:str, output_dir:str, threshold:float = 0.5, resize:tuple[int, int] = None) -> None:
+    """Converts all bitmap images in a folder to a buffer in another file. Great for converting a group of bitmap images to various sizes, ready for display on SSD-1306."""
+    convert_images(original_bitmaps_dir, output_dir, sizes=[resize], threshold=threshold, size_folders=False)
+
+MANIFEST_NAME:str = ".bgmanifest" # no ".json" extension, so json_to_binary and compile_bundle never mistake it for a graphic
+
+def _convert_image_job(job:tuple) -> tuple:
+    """Converts one source image to every (size, path) it is needed at. Runs in a worker process, so it has to live at the top level of the module."""
+    source_path, outputs, threshold, dither = job
+    started:int = ticks_us()
+
+    # decode once
+    original = PIL.Image.open(source_path)
+    original.load()
+
+    # convert once per size, then save that result in every requested format
+    converted:dict = {}
+    for size, path in outputs:
+        if size not in converted:
+            converted[size] = image_to_BitGraphic(original, threshold=threshold, resize=size, dither=dither)
+        converted[size].to_file(path)
+
+    return (source_path, ticks_diff(ticks_us(), started) / 1000)
+
+def convert_images(source_dir:str, output_dir:str, sizes:list[tuple[int, int]] = None, formats:list[str] = None, threshold:"float|str" = 0.5, dither:str = None, workers:int = None, size_folders:bool = True) -> dict:
+    """
+    Converts every image in a folder to BitGraphics, at every requested size and in every requested format, across a pool of worker processes.
+
+    Parameters
+    ----------
+    source_dir:str
+        The folder of bitmap images (PNG, JPG, etc.), i.e. graphics/alphanumeric2/bitmaps.
+    output_dir:str
+        Where the graphics are written: output_dir/{width}x{height}/{name}.{format}, i.e. graphics/alphanumeric2/16x16/a.json.
+    sizes:list[tuple[int, int]], optional
+        The (width, height) sizes to produce. None in place of a size keeps the image's own size (written to an "original" folder). Defaults to [None].
+    formats:list[str], optional
+        The file extensions to produce, ".json" and/or BINARY_EXTENSION. Defaults to [".json"].
+    threshold, dither
+        Passed on to image_to_BitGraphic.
+    workers:int, optional
+        The number of worker processes. Defaults to one per CPU core; 1 converts in this process.
+    size_folders:bool, optional
+        If False, every graphic is written directly into output_dir (only makes sense with a single size).
+
+    Returns
+    -------
+    dict
+        {"converted": {source file name: milliseconds}, "skipped": [source file names that were already up to date]}
+    """
+    import hashlib
+    import concurrent.futures
+
+    if PIL == None:
+        raise Exception("Converting images requires Pillow (pip install pillow).")
+    if sizes == None:
+        sizes = [None]
+    if formats == None:
+        formats = [".json"]
+    if len(sizes) > 1 and not size_folders:
+        raise Exception("Converting to more than one size needs a folder per size.")
+
+    # load what was produced last time, keyed by output path (relative to output_dir)
+    manifest_path:str = os.path.join(output_dir, MANIFEST_NAME)
+    manifest:dict = {}
+    if os.path.exists(manifest_path):
+        f = open(manifest_path, "r")
+        manifest = json.loads(f.read())
+        f.close()
+
+    # work out which outputs are missing or stale. An output is up to date if it exists and was made from the same source content with the same settings.
+    image_extensions = PIL.Image.registered_extensions()
+    jobs:list[tuple] = []
+    pending:dict = {} # source file name: [(relative output path, key)]
+    skipped:list[str] = []
+    for filename in sorted(os.listdir(source_dir)):
+        source_path:str = os.path.join(source_dir, filename)
+        stem, extension = os.path.splitext(filename)
+        if extension.lower() not in image_extensions or not os.path.isfile(source_path):
+            continue
+        f = open(source_path, "rb")
+        digest:str = hashlib.sha1(f.read()).hexdigest()
+        f.close()
+
+        outputs:list[tuple] = []
+        for size in sizes:
+            folder:str = ""
+            if size_folders:
+                folder = "original" if size == None else str(size[0]) + "x" + str(size[1])
+            for extension in formats:
+                relative:str = os.path.join(folder, stem + extension)
+                key:str = digest + "|" + str(size) + "|" + str(threshold) + "|" + str(dither)
+                if manifest.get(relative) == key and os.path.exists(os.path.join(output_dir, relative)):
+                    continue
+                outputs.append((size, relative, key))
+
+        if len(outputs) == 0:
+            skipped.append(filename)
+            continue
+        for size, relative, key in outputs:
+            os.makedirs(os.path.dirname(os.path.join(output_dir, relative)), exist_ok=True)
+        pending[source_path] = [(relative, key) for size, relative, key in outputs]
+        jobs.append((source_path, [(size, os.path.join(output_dir, relative)) for size, relative, key in outputs], threshold, dither))
+
+    # convert. A pool only pays for itself with more than one job.
+    converted:dict = {}
+    def finished(source_path:str, ms:float) -> None:
+        for relative, key in pending[source_path]:
+            manifest[relative] = key
+        converted[os.path.basename(source_path)] = ms
+        print("Finished converting '" + os.path.basename(source_path) + "' (" + str(len(pending[source_path])) + " outputs) in " + str(round(ms, 1)) + " ms!")
+
+    try:
+        if workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                finished(*_convert_image_job(job))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in concurrent.futures.as_completed([pool.submit(_convert_image_job, job) for job in jobs]):
+                    finished(*future.result())
+    finally: # record whatever did finish, so an interrupted run picks up where it left off
+        if len(converted) > 0:
+            os.makedirs(output_dir, exist_ok=True)
+            f = open(manifest_path, "w")
+            f.write(json.dumps(manifest, sort_keys=True, indent=1))
+            f.close()
+
+    print("Converted " + str(len(converted)) + " images, skipped " + str(len(skipped)) + " unchanged.")
+    return {"converted": converted, "skipped": skipped}
+
+def json_to_binary(json_dir:str, output_dir:str = None) -> None:
+    """Converts every JSON-encoded BitGraphic in a directory tree (i.e. graphics/) to the compact binary format. By default the ".bg" files are written next to the originals; if output_dir is provided, the folder structure is mirrored there instead."""
+
+    for dirpath, dirnames, filenames in os.walk(json_dir):
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+
+            # load
+            bg = BitGraphic(path=os.path.join(dirpath, filename))
+
+            # determine where it goes
+            target_dir:str = dirpath
+            if output_dir != None:
+                target_dir = os.path.join(output_dir, os.path.relpath(dirpath, json_dir))
+                os.makedirs(target_dir, exist_ok=True)
+
+            # save
+            bg.to_file(os.path.join(target_dir, filename[0:-5] + BINARY_EXTENSION))
+            print("Finished converting '" + os.path.join(dirpath, filename) + "'!")
+
+def compile_bundle(graphics_dir:str, bundle_path:str) -> None:
+    """Packs every BitGraphic (.json or .bg) in a folder, i.e. graphics/alphanumeric/16x16, into a single bundle file that the microcontroller can open with BitGraphicBundle. Each graphic is named by its file name without the extension."""
+
+    # load and encode each graphic
+    names:list[str] = []
+    records:list[bytes] = []
+    for filename in sorted(os.listdir(graphics_dir)):
+        stem, extension = os.path.splitext(filename)
+        if extension != ".json" and extension != BINARY_EXTENSION:
+            continue
+        if stem in names:
+            raise Exception("Folder '" + graphics_dir + "' contains more than one graphic named '" + stem + "'.")
+        names.append(stem)
+        records.append(BitGraphic(path=os.path.join(graphics_dir, filename)).to_bytes())
+
+    # the index comes first, so work out where the graphics will start
+    index_size:int = BUNDLE_HEADER_SIZE
+    for name in names:
+        index_size = index_size + 1 + len(name.encode("utf-8")) + 12
+
+    # write
+    f = open(bundle_path, "wb")
+    f.write(b"BGB" + bytes([BUNDLE_VERSION]) + len(names).to_bytes(2, "little"))
+    offset:int = index_size
+    for i in range(0, len(names)):
+        encoded_name:bytes = names[i].encode("utf-8")
+        width, height = _parse_header(records[i])
+        f.write(bytes([len(encoded_name)]) + encoded_name + width.to_bytes(2, "little") + height.to_bytes(2, "little") + offset.to_bytes(4, "little") + len(records[i]).to_bytes(4, "little"))
+        offset = offset + len(records[i])
+    for record in records:
+        f.write(record)
+    f.close()
+    print("Bundled " + str(len(names)) + " graphics from '" + graphics_dir + "' into '" + bundle_path + "'!")
@@ -0,0 +1,83 @@
+# Stand-in buses for running the SSD1306 driver (and everything drawn through it) off-device, i.e. in tests on a desktop
+# Writes go nowhere, but take as long as configured and can be recorded, so frame pacing, bus traffic and contention can be measured without hardware.
+
+import time
+
+
+class _FakeBus:
+    # latency_ms: fixed time each transaction takes
+    # bytes_per_second: transfer rate, adding len(data) / bytes_per_second to each transaction. None means no extra time.
+    # record: keep a copy of every transaction in log
+    def __init__(self, latency_ms=0.0, bytes_per_second=None, record=False):
+        self.latency_ms = latency_ms
+        self.bytes_per_second = bytes_per_second
+        self.record = record
+        self.log = []  # (address, bytes) of each transaction when recording; address is None on SPI
+        self.transactions = 0
+        self.bytes = 0
+
+    def reset(self):
+        self.log = []
+        self.transactions = 0
+        self.bytes = 0
+
+    def _transfer(self, addr, data):
+        self.transactions += 1
+        self.bytes += len(data)
+        if self.record:
+            self.log.append((addr, bytes(data)))
+        delay = self.latency_ms / 1000
+        if self.bytes_per_second:
+            delay += len(data) / self.bytes_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeI2C(_FakeBus):
+    # stand-in for machine.I2C; about 40000 bytes_per_second matches a 400 kHz bus
+    def __init__(self, latency_ms=0.0, bytes_per_second=None, record=False, addresses=(0x3C,)):
+        super().__init__(latency_ms, bytes_per_second, record)
+        self.addresses = list(addresses)
+
+    def scan(self):
+        return list(self.addresses)
+
+    def writeto(self, addr, buf, stop=True):
+        self._transfer(addr, buf)
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        data = bytearray()
+        for buf in vector:
+            data.extend(buf)
+        self._transfer(addr, data)
+        return len(data)
+
+
+class FakeSPI(_FakeBus):
+    # stand-in for machine.SPI
+    def init(self, baudrate=1000000, polarity=0, phase=0, **kwargs):
+        self.baudrate = baudrate
+
+    def write(self, buf):
+        self._transfer(None, buf)
+
+
+class FakePin:
+    # stand-in for machine.Pin (output only), i.e. the dc, res and cs pins of SSD1306_SPI
+    OUT = 1
+
+    def __init__(self, value=0):
+        self._value = value
+
+    def init(self, mode=None, value=None):
+        if value is not None:
+            self._value = value
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def __call__(self, v=None):
+        return self.value(v)
@@ -0,0 +1,125 @@
+# Pure-Python stand-in for MicroPython's built-in framebuf module (monochrome formats only)
+# Lets bitgraphics and the SSD1306 driver run, be tested and be benchmarked on a desktop. On a microcontroller, use the real framebuf module instead.
+
+MONO_VLSB = 0 # each byte is 8 vertical pixels, least significant bit on top (SSD1306 layout)
+MONO_HLSB = 3 # each byte is 8 horizontal pixels, most significant bit on the left (BitGraphic layout)
+MONO_HMSB = 4 # each byte is 8 horizontal pixels, least significant bit on the left
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format != MONO_VLSB and format != MONO_HLSB and format != MONO_HMSB:
+            raise ValueError("invalid format")
+        if memoryview(buffer).readonly:
+            raise TypeError("buffer must be writable")  # like MicroPython, which needs a writable buffer even to only read from it
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride == None else stride # in pixels, like MicroPython
+        if format == MONO_VLSB:
+            needed = ((height + 7) // 8) * self.stride
+        else:
+            needed = ((self.stride + 7) // 8) * height
+        if len(buffer) < needed:
+            raise ValueError("buffer too small")
+
+    def _locate(self, x, y):
+        """Returns the (byte index, bit mask) of a pixel"""
+        if self.format == MONO_VLSB:
+            return ((y >> 3) * self.stride + x, 1 << (y & 7))
+        index = (y * ((self.stride + 7) >> 3)) + (x >> 3)
+        if self.format == MONO_HLSB:
+            return (index, 0x80 >> (x & 7))
+        return (index, 1 << (x & 7))
+
+    def _get(self, x, y):
+        index, mask = self._locate(x, y)
+        return 1 if self.buffer[index] & mask else 0
+
+    def _set(self, x, y, c):
+        index, mask = self._locate(x, y)
+        if c:
+            self.buffer[index] |= mask
+        else:
+            self.buffer[index] &= ~mask & 0xFF
+
+    def pixel(self, x, y, c=None):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return None
+        if c == None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill(self, c):
+        self.buffer[:] = bytes([0xFF if c else 0x00]) * len(self.buffer)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + w)
+        y1 = min(self.height, y + h)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        # clip to the overlapping rectangle, like MicroPython
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + fbuf.width)
+        y1 = min(self.height, y + fbuf.height)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                c = fbuf._get(xx - x, yy - y)
+                if c != key:
+                    if palette != None:
+                        c = palette._get(c, 0)
+                    self._set(xx, yy, c)
+
+    def scroll(self, xstep, ystep):
+        # like MicroPython, pixels scrolled in keep their previous values
+        if xstep < 0:
+            xs, xe, dx = 0, self.width + xstep, 1
+        else:
+            xs, xe, dx = self.width - 1, xstep - 1, -1
+        if ystep < 0:
+            ys, ye, dy = 0, self.height + ystep, 1
+        else:
+            ys, ye, dy = self.height - 1, ystep - 1, -1
+        for yy in range(ys, ye, dy):
+            for xx in range(xs, xe, dx):
+                self._set(xx, yy, self._get(xx - xstep, yy - ystep))
@@ -1,7 +1,21 @@
 # MicroPython SSD1306 OLED driver, I2C and SPI interfaces
  
-from micropython import const
-import framebuf
+try:
+    from micropython import const
+except ImportError:  # not running on MicroPython
+    def const(x):
+        return x
+try:
+    import framebuf
+except ImportError:  # not running on MicroPython, use the pure-Python stand-in
+    import pyframebuf as framebuf
+try:
+    from time import sleep_ms
+except ImportError:  # not running on MicroPython
+    from time import sleep
+
+    def sleep_ms(ms):
+        sleep(ms / 1000)
  
 # register definitions
 SET_CONTRAST = const(0x81)
@@ -21,6 +35,13 @@ SET_DISP_CLK_DIV = const(0xD5)
 SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
+SET_HSCROLL = const(0x26)  # | 0x01 to scroll left
+SET_VHSCROLL = const(0x29)  # | 0x03 (0x2A) to scroll left
+SET_VSCROLL_AREA = const(0xA3)
+SET_SCROLL = const(0x2E)  # | 0x01 to start scrolling
+ 
+# frames between scroll steps -> scroll interval setting
+SCROLL_INTERVALS = {5: 0b000, 64: 0b001, 128: 0b010, 256: 0b011, 3: 0b100, 4: 0b101, 25: 0b110, 2: 0b111}
  
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
@@ -31,43 +52,54 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self.shadow = None  # copy of the buffer as last sent to the display, None when unknown
+        self.bytes_sent = 0  # display RAM bytes sent by show()
+        self.bytes_saved = 0  # display RAM bytes show() skipped because they had not changed
+        self.window_cmds = bytearray(6)  # reused by show() for each address window
+        self.transactions = 0  # writes to the bus
+        self.bus_bytes = 0  # bytes written to the bus, commands and data
+        self.scrolling = False  # a hardware scroll is running
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
  
     def init_display(self):
-        for cmd in (
-            SET_DISP | 0x00,  # off
-            # address setting
-            SET_MEM_ADDR,
-            0x00,  # horizontal
-            # resolution and layout
-            SET_DISP_START_LINE | 0x00,
-            SET_SEG_REMAP | 0x01,  # column addr 127 mapped to SEG0
-            SET_MUX_RATIO,
-            self.height - 1,
-            SET_COM_OUT_DIR | 0x08,  # scan from COM[N] to COM0
-            SET_DISP_OFFSET,
-            0x00,
-            SET_COM_PIN_CFG,
-            0x02 if self.width > 2 * self.height else 0x12,
-            # timing and driving scheme
-            SET_DISP_CLK_DIV,
-            0x80,
-            SET_PRECHARGE,
-            0x22 if self.external_vcc else 0xF1,
-            SET_VCOM_DESEL,
-            0x30,  # 0.83*Vcc
-            # display
-            SET_CONTRAST,
-            0xFF,  # maximum
-            SET_ENTIRE_ON,  # output follows RAM contents
-            SET_NORM_INV,  # not inverted
-            # charge pump
-            SET_CHARGE_PUMP,
-            0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+        self.shadow = None
+        self.scrolling = False
+        self.write_cmds(
+            (
+                SET_DISP | 0x00,  # off
+                # address setting
+                SET_MEM_ADDR,
+                0x00,  # horizontal
+                # resolution and layout
+                SET_DISP_START_LINE | 0x00,
+                SET_SEG_REMAP | 0x01,  # column addr 127 mapped to SEG0
+                SET_MUX_RATIO,
+                self.height - 1,
+                SET_COM_OUT_DIR | 0x08,  # scan from COM[N] to COM0
+                SET_DISP_OFFSET,
+                0x00,
+                SET_COM_PIN_CFG,
+                0x02 if self.width > 2 * self.height else 0x12,
+                # timing and driving scheme
+                SET_DISP_CLK_DIV,
+                0x80,
+                SET_PRECHARGE,
+                0x22 if self.external_vcc else 0xF1,
+                SET_VCOM_DESEL,
+                0x30,  # 0.83*Vcc
+                # display
+                SET_CONTRAST,
+                0xFF,  # maximum
+                SET_ENTIRE_ON,  # output follows RAM contents
+                SET_NORM_INV,  # not inverted
+                # charge pump
+                SET_CHARGE_PUMP,
+                0x10 if self.external_vcc else 0x14,
+                SET_SCROLL | 0x00,  # not scrolling
+                SET_DISP | 0x01,  # on
+            )
+        )
         self.fill(0)
         self.show()
  
@@ -78,26 +110,147 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_DISP | 0x01)
  
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.write_cmds((SET_CONTRAST, contrast))
  
     def invert(self, invert):
-        self.write_cmd(SET_NORM_INV | (invert & 1))
+        self.write_cmds((SET_NORM_INV | (invert & 1),))
+ 
+    def write_cmds(self, cmds):
+        # send a sequence of command bytes; subclasses send them in a single bus transaction
+        for cmd in cmds:
+            self.write_cmd(cmd)
+ 
+    def invalidate(self):
+        # forget what the display is showing, so the next show() sends the whole buffer
+        self.shadow = None
+ 
+    def scroll_horizontal(self, left=False, start_page=0, end_page=None, interval=5):
+        # continuously scroll pages start_page to end_page of the display RAM one column at a time, wrapping around.
+        # interval is the number of frames between steps, one of the keys of SCROLL_INTERVALS. Call scroll_start() to start.
+        if end_page is None:
+            end_page = self.pages - 1
+        self.scroll_stop()  # the scroll can only be set up while stopped
+        self.write_cmds((SET_HSCROLL | (left & 1), 0x00, start_page, self._scroll_interval(interval), end_page, 0x00, 0xFF))
+ 
+    def scroll_diagonal(self, left=False, start_page=0, end_page=None, interval=5, vertical_offset=1, top_fixed=0, rows=None):
+        # like scroll_horizontal, but every step also moves rows top_fixed to top_fixed + rows up by vertical_offset rows.
+        # rows outside of the vertical scroll area (top_fixed, rows) stay where they are. A vertical_offset of 0 scrolls horizontally only.
+        if end_page is None:
+            end_page = self.pages - 1
+        if rows is None:
+            rows = self.height - top_fixed
+        self.scroll_stop()
+        self.write_cmds(
+            (
+                SET_VSCROLL_AREA,
+                top_fixed,
+                rows,
+                SET_VHSCROLL | (0x03 if left else 0x00),
+                0x00,
+                start_page,
+                self._scroll_interval(interval),
+                end_page,
+                vertical_offset,
+            )
+        )
+ 
+    def scroll_start(self):
+        # start the scroll set up by scroll_horizontal or scroll_diagonal. The display moves its own RAM, nothing more is sent.
+        self.write_cmd(SET_SCROLL | 0x01)
+        self.scrolling = True
+ 
+    def scroll_stop(self):
+        # stop scrolling. What the display shows no longer matches the buffer, so the next show() sends everything.
+        if not self.scrolling:
+            return
+        self.write_cmd(SET_SCROLL | 0x00)
+        self.scrolling = False
+        self.invalidate()
+ 
+    def _scroll_interval(self, frames):
+        if frames not in SCROLL_INTERVALS:
+            raise ValueError("scroll interval must be one of " + str(sorted(SCROLL_INTERVALS)) + " frames")
+        return SCROLL_INTERVALS[frames]
  
-    def show(self):
+    def show(self, full=False, buffer=None):
+        # send only the parts of the buffer that changed since the last show(),
+        # found by comparing each page against the shadow copy of what was sent.
+        # buffer optionally sends another buffer of the same size (i.e. a committed frame) instead of self.buffer
+        for _ in self.show_windows(full, buffer):
+            pass
+ 
+    def show_windows(self, full=False, buffer=None, paged=False):
+        # generator form of show(): sends the same windows, yielding after each one so the caller (i.e. an asyncio task) can run other code between them.
+        # paged sends a full frame one page at a time instead of in one window, so that no window takes longer than a page.
+        # the buffer must not change until the generator is finished. If it is abandoned part way, the next show() sends everything.
+        # writing the display RAM during a hardware scroll corrupts it, so a running scroll is stopped first
+        if self.scrolling:
+            self.scroll_stop()
+        buf = self.buffer if buffer is None else buffer
         x0 = 0
-        x1 = self.width - 1
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
             x0 += 32
-            x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        if full or self.shadow is None:
+            shadow = self.shadow
+            self.shadow = None  # until every page is sent
+            if paged:
+                width = self.width
+                mv = memoryview(buf)
+                for page in range(self.pages):
+                    self._send_window(x0, x0 + width - 1, page, page, mv[page * width : (page + 1) * width])
+                    yield
+            else:
+                self._send_window(x0, x0 + self.width - 1, 0, self.pages - 1, buf)
+            if shadow is None:
+                shadow = bytearray(buf)
+            else:
+                shadow[:] = buf
+            self.shadow = shadow
+            self.bytes_sent += len(buf)
+            if not paged:
+                yield
+            return
+        shadow = self.shadow
+        width = self.width
+        spans = []  # (page, first byte, last byte) of each changed page
+        changed = 0
+        for page in range(self.pages):
+            start = page * width
+            end = start + width
+            if buf[start:end] == shadow[start:end]:
+                continue
+            lo = start
+            while buf[lo] == shadow[lo]:
+                lo += 1
+            hi = end - 1
+            while buf[hi] == shadow[hi]:
+                hi -= 1
+            spans.append((page, lo, hi))
+            changed += hi - lo + 1
+        if changed * 4 > len(buf) * 3:
+            # nearly everything changed, one window is cheaper than many
+            yield from self.show_windows(True, buf, paged)
+            return
+        for page, lo, hi in spans:
+            start = page * width
+            self._send_window(x0 + lo - start, x0 + hi - start, page, page, memoryview(buf)[lo : hi + 1])
+            shadow[lo : hi + 1] = buf[lo : hi + 1]
+            self.bytes_sent += hi - lo + 1
+            self.bytes_saved += width - (hi - lo + 1)
+            yield
+        self.bytes_saved += (self.pages - len(spans)) * width
+ 
+    def _send_window(self, col0, col1, page0, page1, data):
+        cmds = self.window_cmds
+        cmds[0] = SET_COL_ADDR
+        cmds[1] = col0
+        cmds[2] = col1
+        cmds[3] = SET_PAGE_ADDR
+        cmds[4] = page0
+        cmds[5] = page1
+        self.write_cmds(cmds)
+        self.write_data(data)
  
  
 class SSD1306_I2C(SSD1306):
@@ -106,16 +259,29 @@ class SSD1306_I2C(SSD1306):
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0: every following byte is a command
         super().__init__(width, height, external_vcc)
  
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
+        self.transactions += 1
+        self.bus_bytes += 2
+ 
+    def write_cmds(self, cmds):
+        if not isinstance(cmds, (bytes, bytearray)):
+            cmds = bytes(cmds)
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+        self.transactions += 1
+        self.bus_bytes += 1 + len(cmds)
  
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
+        self.transactions += 1
+        self.bus_bytes += 1 + len(buf)
  
  
 class SSD1306_SPI(SSD1306):
@@ -125,30 +291,38 @@ class SSD1306_SPI(SSD1306):
         res.init(res.OUT, value=0)
         cs.init(cs.OUT, value=1)
         self.spi = spi
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.dc = dc
         self.res = res
         self.cs = cs
-        import time
- 
+        self.cmd_buf = bytearray(1)
         self.res(1)
-        time.sleep_ms(1)
+        sleep_ms(1)
         self.res(0)
-        time.sleep_ms(10)
+        sleep_ms(10)
         self.res(1)
         super().__init__(width, height, external_vcc)
  
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.cmd_buf[0] = cmd
+        self.write_cmds(self.cmd_buf)
+ 
+    def write_cmds(self, cmds):
+        if not isinstance(cmds, (bytes, bytearray)):
+            cmds = bytes(cmds)
         self.cs(1)
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self.spi.write(cmds)
         self.cs(1)
+        self.transactions += 1
+        self.bus_bytes += len(cmds)
  
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(1)
         self.cs(0)
         self.spi.write(buf)
-        self.cs(1)
\ No newline at end of file
+        self.cs(1)
+        self.transactions += 1
+        self.bus_bytes += len(buf)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Regression cases for loading JSON-serialized BitGraphics as they stream in (BitGraphic.from_stream). Run with: python -m pytest tests
+
+import os
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "src"))
+
+import bitgraphics
+
+DATA = os.path.join(_here, "data")
+
+
+def test_multibyte_character_across_reads():
+    # an extra "label" property whose "é"s (2 bytes each in UTF-8) straddle the end of the first 1024-byte read
+    bg = bitgraphics.BitGraphic(path=os.path.join(DATA, "utf8_label.json"))
+    assert bg.width == 8 and bg.height == 8
+    for y in range(0, 8):
+        for x in range(0, 8):
+            assert bg.bit(x, y) == (x == y)